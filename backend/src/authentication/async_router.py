@@ -0,0 +1,79 @@
+import logging
+
+from fastapi import Depends, APIRouter, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from backend.src.authentication.schemas import Token
+from backend.src.authentication.domain import check_user_credentials, user_access_token
+from backend.src.common.exceptions import UserAlreadyExistsError
+from backend.src.common.logging_config import setup_logging
+from backend.src.database import async_crud
+from backend.src.database.dependencies import get_async_db
+from backend.src.users.schemas import UserSignup, SignupResponse
+from backend.src.users.service import new_user_from_signup
+
+setup_logging()
+
+logger = logging.getLogger("hem_tracker")
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authentication"]
+)
+
+
+@router.post(
+    "/login",
+    response_model=Token,
+    summary="Create access token for user",
+    response_description="Access token for authenticated user",
+)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+) -> Token:
+    try:
+        logger.debug("Login endpoint accessed.")
+        logger.info(f"Attempt to create access token for user  {form_data.username}.")
+        user = await async_crud.get_user_by_username(db=db, username=form_data.username)
+        # bcrypt is deliberately slow, it must not hold up the event loop.
+        await run_in_threadpool(check_user_credentials, user, form_data.password, form_data.username)
+        return user_access_token(user)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during login. Check if password is correct.",
+        ) from exc
+
+
+@router.post(
+    "/signup",
+    response_model=SignupResponse,
+    summary="Registers a new user in the system",
+    response_description="User successfully created",
+)
+async def signup(user: UserSignup, db: AsyncSession = Depends(get_async_db)) -> SignupResponse:
+    try:
+        logger.debug("Sign up endpoint accessed.")
+        logger.info(f"User {user} attempted to sign up.")
+        if await async_crud.get_user_by_username(db, user.username):
+            raise UserAlreadyExistsError("Username already registered")
+        if user.email and await async_crud.get_user_by_email(db, user.email):
+            raise UserAlreadyExistsError("Email already registered")
+        await async_crud.create_user(db=db, user=new_user_from_signup(user))
+        return SignupResponse(detail="Signup successful")
+    except ValidationError as exc:
+        logger.error(f"Validation error occurred: {str(exc)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except UserAlreadyExistsError as exc:
+        logger.error(f"Username or email already registered for user {user.username}: {str(exc)}")
+        raise
+    except Exception as exc:
+        logger.error(f"Server error occurred: {str(exc)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error during signup"
+        )
@@ -17,6 +17,10 @@ logger = logging.getLogger("hem_tracker")
 
 def create_user_access_token(db: Session, username: str, password: str) -> Token:
     user = validate_user_credentials(db, password, username)
+    return user_access_token(user)
+
+
+def user_access_token(user) -> Token:
     token_data = create_token_data(user=user)
     access_token = create_access_token(data=token_data)
 
@@ -26,6 +30,10 @@ def create_user_access_token(db: Session, username: str, password: str) -> Token
 def validate_user_credentials(db, password, username):
     logger.debug(f"Try to find user in database: {username}")
     user = get_user_by_username(db=db, username=username)
+    return check_user_credentials(user, password, username)
+
+
+def check_user_credentials(user, password, username):
     if not user:
         logger.debug(f"Could not find user in database: {username}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -24,3 +24,13 @@ class UserNotFoundException(HTTPException):
 class InvalidTokenException(HTTPException):
     def __init__(self, detail: str = "Invalid or expired token"):
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class ComputeBusyError(HTTPException):
+    def __init__(self, detail: str = "Too many computations queued, please try again shortly."):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+
+
+class NotAcceptableError(HTTPException):
+    def __init__(self, detail: str = "None of the accepted media types can be produced."):
+        super().__init__(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=detail)
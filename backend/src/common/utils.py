@@ -1,3 +1,5 @@
+from typing import Optional, Tuple
+
 import numpy as np
 
 
@@ -7,3 +9,35 @@ def calculate_decay_constant(peak_level: float, measured_level: float, time_elap
 
 def calculate_halving_time(decay_constant: float) -> float:
     return float(f"{abs(np.log(2) / decay_constant):.1f}")
+
+
+def decay_fit_terms(peak_level: float, measured_level: float, time_elapsed: float) -> Tuple[float, float, float]:
+    # Contribution of one measurement to the fit of log(measured / peak) = decay_constant * time_elapsed.
+    log_ratio = float(np.log(measured_level) - np.log(peak_level))
+    return time_elapsed * time_elapsed, time_elapsed * log_ratio, log_ratio * log_ratio
+
+
+def estimate_decay_constant(
+    count: int, sum_tt: float, sum_ty: float, sum_yy: float
+) -> Tuple[float, Optional[float]]:
+    if count < 1 or sum_tt <= 0:
+        raise ValueError("No measurement to fit the decay constant to")
+
+    decay_constant = sum_ty / sum_tt
+    if count < 2:
+        return decay_constant, None
+
+    residual = max(sum_yy - decay_constant * sum_ty, 0.0)
+    return decay_constant, float(np.sqrt(residual / (count - 1) / sum_tt))
+
+
+def mean_and_deviation(count: int, total: float, total_of_squares: float) -> Tuple[float, Optional[float]]:
+    if count < 1:
+        raise ValueError("No values to average")
+
+    mean = total / count
+    if count < 2:
+        return mean, None
+
+    # Rounding can leave the sum of squared deviations slightly negative when all values are equal.
+    return mean, float(np.sqrt(max(total_of_squares - count * mean * mean, 0.0) / (count - 1)))
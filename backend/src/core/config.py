@@ -15,8 +15,37 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARM_UP = int(os.getenv("DB_POOL_WARM_UP", str(DB_POOL_SIZE)))
+
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
 SMTP2GO_KEY = os.getenv("SMTP2GO_KEY")
 SMTP2GO_URL = "https://api.smtp2go.com/v3/email/send"
 
 TEMPLATES_PATH = Path(__file__).parent.parent / 'templates'
 TEMPLATES = Jinja2Templates(directory=str(TEMPLATES_PATH))
+
+LEVEL_CACHE_MAX_ENTRIES = int(os.getenv("LEVEL_CACHE_MAX_ENTRIES", "1024"))
+LEVEL_CACHE_TTL_SECONDS = float(os.getenv("LEVEL_CACHE_TTL_SECONDS", "900"))
+LEVEL_BAND_DRAWS = int(os.getenv("LEVEL_BAND_DRAWS", "500"))
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+# Each worker process caches on its own and only sees its own writes, another one serves a changed user for up to
+# this long. 0 disables the cache.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+USER_CURVE_WORKERS = int(os.getenv("USER_CURVE_WORKERS", "2"))
+USER_CURVE_MAX_ENTRIES = int(os.getenv("USER_CURVE_MAX_ENTRIES", "1024"))
+USER_CURVE_TTL_SECONDS = float(os.getenv("USER_CURVE_TTL_SECONDS", "3600"))
+
+SCHEDULE_SEARCH_WORKERS = int(os.getenv("SCHEDULE_SEARCH_WORKERS", str(os.cpu_count() or 1)))
+
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", "2"))
+COMPUTE_MAX_PENDING = int(os.getenv("COMPUTE_MAX_PENDING", "32"))
+COMPUTE_INLINE_SAMPLES = int(os.getenv("COMPUTE_INLINE_SAMPLES", "50000"))
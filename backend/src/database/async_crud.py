@@ -0,0 +1,241 @@
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete, insert, ScalarSelect
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.src.common.logging_config import setup_logging
+from backend.src.common.security import pwd_context
+from backend.src.database.cache import user_cache, session_users, detached_user, user_row
+from backend.src.database.models import Measurement, User, PasswordResetToken, DecayFit
+from backend.src.database.crud import user_measurements_query, latest_measurement_id, decay_fit_increments, \
+    fill_decay_fit
+from backend.src.measurement.bulk import PreparedImport, import_chunks
+from backend.src.measurement.schemas import MeasurementCreate, MeasurementDelete, MeasurementOrder
+from backend.src.users.schemas import UserUpdate, UserCreate
+
+setup_logging()
+
+logger = logging.getLogger("hem_tracker")
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
+    users = session_users(db.sync_session)
+    if username in users:
+        return users[username]
+
+    row = user_cache.get(username)
+    if row is not None:
+        user = await db.merge(detached_user(row), load=False)
+    else:
+        user = await db.scalar(select(User).where(User.username == username).limit(1))
+        if user is not None and not db.is_modified(user):
+            user_cache.put(username, user_row(user))
+    if user is not None:
+        users[username] = user
+    return user
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    return await db.scalar(select(User).where(User.email == email).limit(1))
+
+
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
+    # bcrypt is deliberately slow, it must not hold up the event loop.
+    hashed_password = await run_in_threadpool(pwd_context.hash, user.password)
+    db_user = User(
+        first_name=user.first_name,
+        last_name=user.last_name,
+        username=user.username,
+        password=hashed_password,
+        email=user.email,
+        peak_level=user.peak_level,
+        weekly_infusions=user.weekly_infusions
+    )
+
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def update_user_by_username(db: AsyncSession, user_update: UserUpdate) -> User | None:
+    try:
+        username = user_update.username
+        db_user = await get_user_by_username(db=db, username=username)
+        if not db_user:
+            logger.error(f"User update requested for non-existing user: {username}")
+            raise HTTPException(
+                status_code=404,
+                detail=f"User with username {username} not found"
+            )
+
+        if user_update.email:
+            db_user.email = user_update.email
+        if user_update.first_name:
+            db_user.first_name = user_update.first_name
+        if user_update.last_name:
+            db_user.last_name = user_update.last_name
+        if user_update.peak_level:
+            db_user.peak_level = user_update.peak_level
+        if user_update.weekly_infusions:
+            db_user.weekly_infusions = ", ".join(user_update.weekly_infusions)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+    except HTTPException:
+        raise
+    except Exception as exc:
+        await db.rollback()
+        logger.error(f"Error occured while updating info for user {user_update.username} because: {str(exc)}")
+
+
+async def get_user_measurement(db: AsyncSession, user_id: int, measurement_id: int) -> Measurement | None:
+    return await db.scalar(
+        select(Measurement).where(Measurement.user_id == user_id, Measurement.id == measurement_id).limit(1)
+    )
+
+
+async def list_user_measurements(
+    db: AsyncSession,
+    user_id: int,
+    after_id: int | None = None,
+    limit: int | None = None,
+    order: MeasurementOrder = "asc",
+) -> list[Measurement]:
+    return list(await db.scalars(user_measurements_query(user_id, after_id, limit, order)))
+
+
+async def get_measurement(db: AsyncSession, measurement_id: int) -> Measurement:
+    db_measurement = await db.get(Measurement, measurement_id)
+    if not db_measurement:
+        raise HTTPException(status_code=404, detail="No measurement found")
+    return db_measurement
+
+
+async def save_measurement(db: AsyncSession, measurement: MeasurementCreate) -> Measurement | None:
+    try:
+        db_measurement = Measurement(**measurement.model_dump())
+        db.add(db_measurement)
+        await update_decay_fit(db, db_measurement)
+        await db.commit()
+        return db_measurement
+    except Exception as exc:
+        await db.rollback()
+        logger.debug(f"Could not save measurement for user {measurement.user_id}: {exc}")
+
+
+async def save_measurements(db: AsyncSession, user_id: int, prepared: PreparedImport) -> None:
+    try:
+        for chunk in import_chunks(prepared.measurements):
+            await db.execute(insert(Measurement), chunk)
+        await increment_decay_fit(db, user_id, latest_measurement_id(user_id), **prepared.increments)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def delete_measurement(db: AsyncSession, db_measurement: Measurement) -> MeasurementDelete | None:
+    try:
+        deleted = MeasurementDelete(id=db_measurement.id, user_id=db_measurement.user_id)
+        await db.delete(db_measurement)
+        await update_decay_fit(db, db_measurement, sign=-1)
+        await db.commit()
+        return deleted
+    except Exception as exc:
+        await db.rollback()
+        logger.debug(f"Could not delete measurement {db_measurement.id}: {exc}")
+
+
+async def get_decay_fit(db: AsyncSession, user_id: int) -> DecayFit | None:
+    decay_fit = await db.get(DecayFit, user_id)
+    if decay_fit is None:
+        measurements = await db.scalars(select(Measurement).where(Measurement.user_id == user_id))
+        decay_fit = fill_decay_fit(DecayFit(user_id=user_id), measurements)
+    return decay_fit if decay_fit.measurement_count else None
+
+
+async def rebuild_decay_fit(db: AsyncSession, user_id: int) -> DecayFit:
+    decay_fit = await db.get(DecayFit, user_id)
+    if decay_fit is None:
+        decay_fit = DecayFit(user_id=user_id)
+        db.add(decay_fit)
+
+    fill_decay_fit(decay_fit, await db.scalars(select(Measurement).where(Measurement.user_id == user_id)))
+    await db.flush()
+    return decay_fit
+
+
+async def update_decay_fit(db: AsyncSession, measurement: Measurement, sign: int = 1) -> None:
+    await db.flush()
+    await increment_decay_fit(
+        db,
+        measurement.user_id,
+        measurement.id if sign > 0 else latest_measurement_id(measurement.user_id),
+        **decay_fit_increments(measurement, sign),
+    )
+
+
+async def increment_decay_fit(
+    db: AsyncSession, user_id: int, latest_id: int | ScalarSelect, **increments: float
+) -> None:
+    result = await db.execute(
+        update(DecayFit)
+        .where(DecayFit.user_id == user_id)
+        .values(
+            **{name: getattr(DecayFit, name) + value for name, value in increments.items()},
+            latest_measurement_id=latest_id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        await rebuild_decay_fit(db, user_id)
+
+
+async def save_reset_token(db: AsyncSession, user_id: int, reset_token: str) -> PasswordResetToken:
+    db_token = PasswordResetToken(user_id=user_id, token=reset_token)
+    db.add(db_token)
+    await db.commit()
+    await db.refresh(db_token)
+    return db_token
+
+
+async def get_user_by_reset_token(db: AsyncSession, token: str) -> User | None:
+    return await db.scalar(
+        select(User).join(PasswordResetToken, PasswordResetToken.user_id == User.id)
+        .where(PasswordResetToken.token == token)
+        .limit(1)
+    )
+
+
+async def delete_user_measurements(db: AsyncSession, user: User) -> None:
+    try:
+        await db.execute(
+            delete(Measurement).where(Measurement.user_id == user.id).execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(DecayFit).where(DecayFit.user_id == user.id).execution_options(synchronize_session=False)
+        )
+    except Exception as e:
+        logger.error(f"Error deleting measurements for user {user.id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to delete user measurements"
+        )
+
+
+async def delete_user_password_tokens(db: AsyncSession, user: User) -> None:
+    try:
+        await db.execute(
+            delete(PasswordResetToken)
+            .where(PasswordResetToken.user_id == user.id)
+            .execution_options(synchronize_session=False)
+        )
+    except Exception as e:
+        logger.error(f"Error deleting password tokens for user {user.id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to delete user password tokens"
+        )
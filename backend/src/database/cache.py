@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from itertools import chain
+from threading import Lock
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend.src.core.config import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS
+from backend.src.database.models import User, UserInfusion
+
+SESSION_USERS = "users_by_username"
+CHANGED_USERS = "changed_usernames"
+
+UserRow = Dict[str, object]
+
+
+class UserCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, UserRow]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, username: str) -> Optional[UserRow]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or monotonic() - entry[0] > self.ttl:
+                self._entries.pop(username, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, username: str, row: UserRow) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[username] = (monotonic(), row)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            if self._entries.pop(username, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+
+def session_users(session: Session) -> Dict[str, User]:
+    # Sessions live for one request, so this is the request's identity map of users by username.
+    return session.info.setdefault(SESSION_USERS, {})
+
+
+def user_row(user: User) -> UserRow:
+    row = {attribute.key: getattr(user, attribute.key) for attribute in inspect(User).column_attrs}
+    row["infusions"] = [(infusion.weekday, infusion.minute_of_day) for infusion in user.infusions]
+    return row
+
+
+def detached_user(row: UserRow) -> User:
+    # A detached instance with all columns and the schedule loaded, merging it with load=False attaches it without
+    # a SELECT. The values are set as loaded ones, so they are neither validated nor written back.
+    user = User()
+    for key, value in row.items():
+        if key != "infusions":
+            set_committed_value(user, key, value)
+    infusions = []
+    for weekday, minute_of_day in row["infusions"]:
+        infusion = UserInfusion()
+        for key, value in (("user_id", row["id"]), ("weekday", weekday), ("minute_of_day", minute_of_day)):
+            set_committed_value(infusion, key, value)
+        make_transient_to_detached(infusion)
+        infusions.append(infusion)
+    set_committed_value(user, "infusions", infusions)
+    make_transient_to_detached(user)
+    return user
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_users(session: Session, flush_context) -> None:
+    changed = session.info.setdefault(CHANGED_USERS, set())
+    for instance in chain(session.dirty, session.deleted):
+        if isinstance(instance, User):
+            changed.add(inspect(instance).dict.get("username"))
+    for instance in session.deleted:
+        if isinstance(instance, User):
+            session_users(session).pop(inspect(instance).dict.get("username"), None)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session: Session) -> None:
+    # Invalidated once the change is committed, a request reading the row before that still gets the old values.
+    for username in session.info.pop(CHANGED_USERS, ()):
+        if username is None:
+            user_cache.clear()
+        else:
+            user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_users(session: Session) -> None:
+    session.info.pop(CHANGED_USERS, None)
+
+
+user_cache = UserCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
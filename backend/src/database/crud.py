@@ -1,12 +1,15 @@
 import logging
-from typing import Type, Optional
+from typing import Dict, Iterable, Type, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import literal
+from sqlalchemy import func, literal, select, Select, ScalarSelect
 from sqlalchemy.orm import Session
 
 from backend.src.common.logging_config import setup_logging
-from backend.src.database.models import Measurement, User, PasswordResetToken
+from backend.src.common.utils import decay_fit_terms
+from backend.src.database.cache import user_cache, session_users, detached_user, user_row
+from backend.src.database.models import Measurement, User, PasswordResetToken, DecayFit, UserInfusion
+from backend.src.measurement.schemas import MeasurementOrder
 from backend.src.users.schemas import UserUpdate, UserBase
 
 setup_logging()
@@ -15,7 +18,20 @@ logger = logging.getLogger("hem_tracker")
 
 
 def get_user_by_username(db: Session, username: str) -> User | None:
-    return db.query(User).filter(User.username == username).first()
+    users = session_users(db)
+    if username in users:
+        return users[username]
+
+    row = user_cache.get(username)
+    if row is not None:
+        user = db.merge(detached_user(row), load=False)
+    else:
+        user = db.query(User).filter(User.username == username).first()
+        if user is not None and not db.is_modified(user):
+            user_cache.put(username, user_row(user))
+    if user is not None:
+        users[username] = user
+    return user
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
@@ -56,12 +72,133 @@ def update_user_by_username(db: Session, user_update: UserUpdate) -> UserBase:
         logger.error(f"Error occured while updating info for user {user_update.username} because: {str(exc)}")
 
 
-def get_user_measurement(db: Session, user_id: int, measurement_id: int = None) -> Measurement | list[
-    Measurement]:
-    measurements = db.query(Measurement).filter(Measurement.user_id == user_id).all()
-    if measurement_id is not None:
-        return measurements[measurement_id]
-    return measurements
+def get_user_measurement(db: Session, user_id: int, measurement_id: int) -> Measurement | None:
+    return db.query(Measurement).filter(Measurement.user_id == user_id, Measurement.id == measurement_id).first()
+
+
+def list_user_measurements(
+    db: Session, user_id: int, after_id: int | None = None, limit: int | None = None, order: MeasurementOrder = "asc"
+) -> list[Measurement]:
+    return list(db.scalars(user_measurements_query(user_id, after_id, limit, order)))
+
+
+def user_measurements_query(user_id: int, after_id: int | None, limit: int | None, order: MeasurementOrder) -> Select:
+    # Keyset pagination on the primary key: a page continues after the last id of the previous one, so it costs
+    # the same however deep into a user's history it is.
+    query = select(Measurement).where(Measurement.user_id == user_id)
+    if order == "desc":
+        if after_id is not None:
+            query = query.where(Measurement.id < after_id)
+        query = query.order_by(Measurement.id.desc())
+    else:
+        if after_id is not None:
+            query = query.where(Measurement.id > after_id)
+        query = query.order_by(Measurement.id)
+    return query if limit is None else query.limit(limit)
+
+
+def list_users_infusing_between(db: Session, weekday: int, start_minute: int, end_minute: int) -> list[User]:
+    return list(db.scalars(users_infusing_query(weekday, start_minute, end_minute)))
+
+
+def users_infusing_query(weekday: int, start_minute: int, end_minute: int) -> Select:
+    # Users with an infusion on the weekday (Monday is 0) from start_minute up to end_minute of the day, e.g.
+    # (0, 360, 720) for Monday mornings, found on the (weekday, minute_of_day) index of user_infusions.
+    infusing = select(UserInfusion.user_id).where(
+        UserInfusion.weekday == weekday,
+        UserInfusion.minute_of_day >= start_minute,
+        UserInfusion.minute_of_day < end_minute,
+    )
+    return select(User).where(User.id.in_(infusing)).order_by(User.id)
+
+
+def get_decay_fit(db: Session, user_id: int) -> DecayFit | None:
+    decay_fit = db.query(DecayFit).filter(DecayFit.user_id == user_id).first()
+    if decay_fit is None:
+        # Not stored for users without measurements, or whose measurements predate the stored fit and were not
+        # migrated yet. It is computed without being added to the session, reads never write.
+        measurements = db.query(Measurement).filter(Measurement.user_id == user_id)
+        decay_fit = fill_decay_fit(DecayFit(user_id=user_id), measurements)
+    return decay_fit if decay_fit.measurement_count else None
+
+
+def rebuild_decay_fit(db: Session, user_id: int) -> DecayFit:
+    decay_fit = db.query(DecayFit).filter(DecayFit.user_id == user_id).first()
+    if decay_fit is None:
+        decay_fit = DecayFit(user_id=user_id)
+        db.add(decay_fit)
+
+    fill_decay_fit(decay_fit, db.query(Measurement).filter(Measurement.user_id == user_id))
+    db.flush()
+    return decay_fit
+
+
+def fill_decay_fit(decay_fit: DecayFit, measurements: Iterable[Measurement]) -> DecayFit:
+    decay_fit.measurement_count, decay_fit.sum_tt, decay_fit.sum_ty, decay_fit.sum_yy = 0, 0.0, 0.0, 0.0
+    decay_fit.sum_decay_constant, decay_fit.sum_decay_constant_sq = 0.0, 0.0
+    decay_fit.sum_halving_time, decay_fit.sum_halving_time_sq = 0.0, 0.0
+    decay_fit.latest_measurement_id = None
+    for measurement in measurements:
+        sum_tt, sum_ty, sum_yy = decay_fit_terms(
+            measurement.peak_level, measurement.second_level_measurement, measurement.time_elapsed
+        )
+        decay_fit.measurement_count += 1
+        decay_fit.sum_tt += sum_tt
+        decay_fit.sum_ty += sum_ty
+        decay_fit.sum_yy += sum_yy
+        decay_fit.sum_decay_constant += measurement.decay_constant
+        decay_fit.sum_decay_constant_sq += measurement.decay_constant ** 2
+        decay_fit.sum_halving_time += measurement.halving_time
+        decay_fit.sum_halving_time_sq += measurement.halving_time ** 2
+        decay_fit.latest_measurement_id = max(decay_fit.latest_measurement_id or 0, measurement.id)
+    return decay_fit
+
+
+def update_decay_fit(db: Session, measurement: Measurement, sign: int = 1) -> None:
+    # Adds (sign=1) or removes (sign=-1) one measurement in a single UPDATE, so concurrent saves do not lose terms.
+    # The measurement is flushed first, so a fit rebuilt from the rows already reflects it.
+    db.flush()
+    increment_decay_fit(
+        db,
+        measurement.user_id,
+        measurement.id if sign > 0 else latest_measurement_id(measurement.user_id),
+        **decay_fit_increments(measurement, sign),
+    )
+
+
+def increment_decay_fit(
+    db: Session, user_id: int, latest_id: int | ScalarSelect, **increments: float
+) -> None:
+    updated = db.query(DecayFit).filter(DecayFit.user_id == user_id).update(
+        {
+            **{getattr(DecayFit, name): getattr(DecayFit, name) + value for name, value in increments.items()},
+            DecayFit.latest_measurement_id: latest_id,
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        rebuild_decay_fit(db, user_id)
+
+
+def decay_fit_increments(measurement: Measurement, sign: int) -> Dict[str, float]:
+    sum_tt, sum_ty, sum_yy = decay_fit_terms(
+        measurement.peak_level, measurement.second_level_measurement, measurement.time_elapsed
+    )
+    return {
+        "measurement_count": sign,
+        "sum_tt": sign * sum_tt,
+        "sum_ty": sign * sum_ty,
+        "sum_yy": sign * sum_yy,
+        "sum_decay_constant": sign * measurement.decay_constant,
+        "sum_decay_constant_sq": sign * measurement.decay_constant ** 2,
+        "sum_halving_time": sign * measurement.halving_time,
+        "sum_halving_time_sq": sign * measurement.halving_time ** 2,
+    }
+
+
+def latest_measurement_id(user_id: int) -> ScalarSelect:
+    # Ids only grow, so a single new measurement is the latest one. Otherwise it is looked up on the user_id index.
+    return select(func.max(Measurement.id)).where(Measurement.user_id == user_id).scalar_subquery()
 
 
 def save_reset_token(db: Session, user_id: int, reset_token: str) -> str:
@@ -84,6 +221,9 @@ def delete_user_measurements(db: Session, user: User) -> None:
         db.query(Measurement).filter(
             Measurement.user_id == user.id
         ).delete(synchronize_session=False)
+        db.query(DecayFit).filter(
+            DecayFit.user_id == user.id
+        ).delete(synchronize_session=False)
     except Exception as e:
         logger.error(f"Error deleting measurements for user {user.id}: {str(e)}")
         raise HTTPException(
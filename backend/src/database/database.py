@@ -1,12 +1,40 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from backend.src.core.config import USER, PASSWORD, HOST, DB
+from backend.src.core.config import USER, PASSWORD, HOST, DB, DATABASE_ASYNC, ASYNC_DATABASE_URL, DB_POOL_SIZE, \
+    DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from backend.src.database.pool import PoolMonitor
 
 DATABASE_URL = f"mysql+pymysql://{USER}:{PASSWORD}@{HOST}/{DB}"
 
-engine = create_engine(DATABASE_URL)
+# Connections are recycled well before MySQL's wait_timeout closes them on the server side, and pinged on checkout
+# in case the server dropped one anyway.
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async driver is only needed, and only imported, when the async request path is enabled.
+# The queue pool is set explicitly, some async dialects (aiosqlite) would otherwise default to no pooling at all.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL or f"mysql+aiomysql://{USER}:{PASSWORD}@{HOST}/{DB}",
+    poolclass=AsyncAdaptedQueuePool,
+    **POOL_OPTIONS,
+) if DATABASE_ASYNC else None
+
+# Attributes must not expire on commit, reading an expired attribute would need blocking IO outside of an await.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# One monitor per engine: the levels router keeps using the sync engine when the async request path is enabled.
+pool_monitor = PoolMonitor(engine)
+async_pool_monitor = PoolMonitor(async_engine.sync_engine) if DATABASE_ASYNC else None
+
 Base = declarative_base()
@@ -1,9 +1,19 @@
-from .database import SessionLocal
+from .database import SessionLocal, AsyncSessionLocal, pool_monitor, async_pool_monitor
 
 
 def get_db():
     db = SessionLocal()
     try:
+        # Checked out here rather than on the first query, so the wait for a free connection is measured.
+        with pool_monitor.timed_checkout():
+            db.connection()
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        with async_pool_monitor.timed_checkout():
+            await db.connection()
+        yield db
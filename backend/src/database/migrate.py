@@ -0,0 +1,133 @@
+import argparse
+import importlib
+import logging
+import pkgutil
+import sys
+from datetime import datetime
+from types import ModuleType
+from typing import Dict, List
+
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, create_engine, delete, insert, select
+from sqlalchemy.sql import Executable
+
+from backend.src.common.logging_config import setup_logging
+from backend.src.database import migrations
+from backend.src.database.crud import user_measurements_query, users_infusing_query
+from backend.src.database.database import DATABASE_URL
+from backend.src.database.models import DecayFit, Measurement, PasswordResetToken, User, UserInfusion
+
+setup_logging()
+
+logger = logging.getLogger("hem_tracker")
+
+MIGRATION_PREFIX = "v"
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def load_migrations() -> List[ModuleType]:
+    # Migrations are the modules v0001_<name>.py, v0002_<name>.py, ... in database/migrations, applied in order.
+    names = sorted(
+        module.name for module in pkgutil.iter_modules(migrations.__path__) if module.name.startswith(MIGRATION_PREFIX)
+    )
+    return [importlib.import_module(f"{migrations.__name__}.{name}") for name in names]
+
+
+def migration_version(migration: ModuleType) -> int:
+    return int(migration.__name__.rsplit(".", 1)[-1][len(MIGRATION_PREFIX):].split("_", 1)[0])
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def upgrade(engine: Engine) -> List[int]:
+    applied = applied_versions(engine)
+    upgraded = []
+    for migration in load_migrations():
+        version = migration_version(migration)
+        if version in applied:
+            continue
+        # MySQL commits DDL implicitly, a migration that fails halfway has to be safe to run again.
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                insert(schema_migrations).values(
+                    version=version, description=migration.DESCRIPTION, applied_at=datetime.utcnow()
+                )
+            )
+        logger.info(f"Applied migration {version}: {migration.DESCRIPTION}")
+        upgraded.append(version)
+    return upgraded
+
+
+def crud_queries() -> Dict[str, Executable]:
+    # The statements database/crud.py runs on every request, with placeholder values.
+    return {
+        "get_user_by_username": select(User).where(User.username == "username").limit(1),
+        "get_user_by_email": select(User).where(User.email == "user@example.com").limit(1),
+        "get_user_measurement": select(Measurement).where(Measurement.user_id == 1, Measurement.id == 1).limit(1),
+        "list_user_measurements": user_measurements_query(1, None, 100, "asc"),
+        "list_user_measurements (desc, next page)": user_measurements_query(1, 1000, 100, "desc"),
+        "get_decay_fit": select(DecayFit).where(DecayFit.user_id == 1).limit(1),
+        "rebuild_decay_fit": select(Measurement).where(Measurement.user_id == 1),
+        "get_user_by_reset_token": select(PasswordResetToken).where(PasswordResetToken.token == "token").limit(1),
+        "delete_user_measurements": delete(Measurement).where(Measurement.user_id == 1),
+        "delete_user_password_tokens": delete(PasswordResetToken).where(PasswordResetToken.user_id == 1),
+        "load User.infusions": select(UserInfusion).where(UserInfusion.user_id == 1),
+        "list_users_infusing_between": users_infusing_query(0, 360, 720),
+    }
+
+
+def full_table_scans(engine: Engine, statement: Executable) -> List[str]:
+    with engine.connect() as connection:
+        sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        if engine.dialect.name == "sqlite":
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+            return [row.detail for row in plan if row.detail.startswith("SCAN ") and " USING " not in row.detail]
+
+        plan = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+        return [f"SCAN {row['table']}" for row in plan if row["type"] == "ALL"]
+
+
+def check_query_plans(engine: Engine) -> Dict[str, List[str]]:
+    scans = {name: full_table_scans(engine, statement) for name, statement in crud_queries().items()}
+    return {name: tables for name, tables in scans.items() if tables}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Versioned schema migrations of the Hemophilia Tracker database.")
+    parser.add_argument("command", choices=["upgrade", "status", "check-plans"])
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL, the configured MySQL database by default.")
+    arguments = parser.parse_args()
+    engine = create_engine(arguments.url)
+
+    if arguments.command == "upgrade":
+        upgraded = upgrade(engine)
+        print(f"Applied migrations: {upgraded}" if upgraded else "Database is up to date")
+        return 0
+
+    if arguments.command == "status":
+        applied = applied_versions(engine)
+        for migration in load_migrations():
+            version = migration_version(migration)
+            print(f"{version:04d} {'applied' if version in applied else 'pending':8} {migration.DESCRIPTION}")
+        return 0
+
+    scans = check_query_plans(engine)
+    for name, tables in scans.items():
+        print(f"{name}: {', '.join(tables)}")
+    print("Some queries scan whole tables" if scans else "No query scans a whole table")
+    return 1 if scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Connection, Double, ForeignKey, Integer, MetaData, Table
+
+DESCRIPTION = "Create the decay_fits table"
+
+# Migrations describe the schema as it was at their version, not as the models describe it today.
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+
+decay_fits = Table(
+    "decay_fits",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("measurement_count", Integer, nullable=False, default=0),
+    Column("sum_tt", Double, nullable=False, default=0.0),
+    Column("sum_ty", Double, nullable=False, default=0.0),
+    Column("sum_yy", Double, nullable=False, default=0.0),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    # Databases set up from the README before migrations existed may already have the table.
+    decay_fits.create(connection, checkfirst=True)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Connection, Index, Inspector, Integer, MetaData, String, Table, inspect
+
+DESCRIPTION = "Index measurements.user_id, users.email and password_reset_tokens.user_id"
+
+metadata = MetaData()
+
+measurements = Table("measurements", metadata, Column("user_id", Integer))
+users = Table("users", metadata, Column("email", String(255)))
+password_reset_tokens = Table("password_reset_tokens", metadata, Column("user_id", Integer))
+
+INDEXES = [
+    Index("ix_measurements_user_id", measurements.c.user_id),
+    Index("ix_users_email", users.c.email),
+    Index("ix_password_reset_tokens_user_id", password_reset_tokens.c.user_id),
+]
+
+
+def is_indexed(inspector: Inspector, table: str, column: str) -> bool:
+    # Any index that starts with the column serves lookups on it, whatever it is called: MySQL creates one named
+    # after the column for every foreign key, and tables created from the current models have their own.
+    indexes = inspector.get_indexes(table) + inspector.get_unique_constraints(table)
+    return any(index["column_names"][:1] == [column] for index in indexes)
+
+
+def upgrade(connection: Connection) -> None:
+    inspector = inspect(connection)
+    for index in INDEXES:
+        column = index.columns[0].name
+        if not is_indexed(inspector, index.table.name, column):
+            index.create(connection)
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Connection, Double, Float, Integer, MetaData, Table, func, inspect, select, text, update
+
+DESCRIPTION = "Add decay constant and halving time sums and the latest measurement id to decay_fits"
+
+metadata = MetaData()
+
+measurements = Table(
+    "measurements",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("decay_constant", Float(2)),
+    Column("halving_time", Float(2)),
+)
+
+COLUMNS = {
+    "sum_decay_constant": "DOUBLE NOT NULL DEFAULT 0",
+    "sum_decay_constant_sq": "DOUBLE NOT NULL DEFAULT 0",
+    "sum_halving_time": "DOUBLE NOT NULL DEFAULT 0",
+    "sum_halving_time_sq": "DOUBLE NOT NULL DEFAULT 0",
+    "latest_measurement_id": "INTEGER NULL",
+}
+
+decay_fits = Table(
+    "decay_fits",
+    metadata,
+    Column("user_id", Integer, primary_key=True),
+    *(Column(name, Integer if name == "latest_measurement_id" else Double) for name in COLUMNS),
+)
+
+
+def of_user(expression) -> object:
+    return select(expression).where(measurements.c.user_id == decay_fits.c.user_id).scalar_subquery()
+
+
+def upgrade(connection: Connection) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns("decay_fits")}
+    for name, definition in COLUMNS.items():
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE decay_fits ADD COLUMN {name} {definition}"))
+
+    # Fits built before this migration get their new sums from the measurements they were built from.
+    connection.execute(
+        update(decay_fits).values(
+            sum_decay_constant=func.coalesce(of_user(func.sum(measurements.c.decay_constant)), 0),
+            sum_decay_constant_sq=func.coalesce(
+                of_user(func.sum(measurements.c.decay_constant * measurements.c.decay_constant)), 0
+            ),
+            sum_halving_time=func.coalesce(of_user(func.sum(measurements.c.halving_time)), 0),
+            sum_halving_time_sq=func.coalesce(
+                of_user(func.sum(measurements.c.halving_time * measurements.c.halving_time)), 0
+            ),
+            latest_measurement_id=of_user(func.max(measurements.c.id)),
+        )
+    )
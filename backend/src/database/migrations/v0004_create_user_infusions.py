@@ -0,0 +1,81 @@
+import logging
+import re
+from typing import List
+
+from sqlalchemy import Column, Connection, ForeignKey, Index, Integer, MetaData, SmallInteger, String, Table, \
+    exists, insert, select
+
+DESCRIPTION = "Store the weekly infusion times of the users as (weekday, minute of the day) rows in user_infusions"
+
+logger = logging.getLogger("hem_tracker")
+
+BACKFILL_CHUNK_SIZE = 1000
+
+# Frozen copy of the infusion time format at the time of this migration, so later changes to the app cannot alter it.
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+INFUSION_TIME_PATTERN = re.compile(
+    r"^\s*(?P<weekday>[A-Za-z]+)\s+(?P<hour>\d{1,2}):(?P<minute>\d{1,2})\s*(?P<period>[AaPp][Mm])\s*$"
+)
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String(255)),
+    Column("weekly_infusions", String(1000)),
+)
+
+user_infusions = Table(
+    "user_infusions",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("weekday", SmallInteger, primary_key=True, autoincrement=False),
+    Column("minute_of_day", SmallInteger, primary_key=True, autoincrement=False),
+    Index("ix_user_infusions_weekday_minute_of_day", "weekday", "minute_of_day"),
+)
+
+
+def parse_minute_of_week(time_str: str) -> int:
+    match = INFUSION_TIME_PATTERN.match(time_str)
+    if not match or match["weekday"] not in WEEKDAYS:
+        raise ValueError(f"Invalid infusion time: {time_str!r}, expected e.g. 'Monday 08:30 AM'")
+
+    hour, minute = int(match["hour"]), int(match["minute"])
+    if not 1 <= hour <= 12 or minute > 59:
+        raise ValueError(f"Invalid infusion time: {time_str!r}, expected e.g. 'Monday 08:30 AM'")
+
+    hour = hour % 12 + (12 if match["period"].upper() == "PM" else 0)
+    return (WEEKDAYS.index(match["weekday"]) * 24 + hour) * 60 + minute
+
+
+def parse_minutes_of_week(weekly_infusions: str) -> List[int]:
+    return sorted({parse_minute_of_week(infusion) for infusion in weekly_infusions.split(", ")})
+
+
+def upgrade(connection: Connection) -> None:
+    user_infusions.create(connection, checkfirst=True)
+
+    # Users that already have rows were migrated by an earlier, interrupted run.
+    pending = select(users.c.id, users.c.username, users.c.weekly_infusions).where(
+        users.c.weekly_infusions.is_not(None),
+        users.c.weekly_infusions != "",
+        ~exists().where(user_infusions.c.user_id == users.c.id),
+    )
+    rows = []
+    for user_id, username, weekly_infusions in connection.execute(pending).all():
+        try:
+            minutes_of_week = parse_minutes_of_week(weekly_infusions)
+        except ValueError as exc:
+            # Left as text only, computations for this user keep failing on it as before.
+            logger.warning(f"Infusion times of user {username} not migrated: {exc}")
+            continue
+        rows.extend(
+            {"user_id": user_id, "weekday": minute // (24 * 60), "minute_of_day": minute % (24 * 60)}
+            for minute in minutes_of_week
+        )
+
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        connection.execute(insert(user_infusions), rows[start:start + BACKFILL_CHUNK_SIZE])
@@ -0,0 +1,83 @@
+from typing import Dict, Tuple
+
+import numpy as np
+from sqlalchemy import Column, Connection, Double, Float, Integer, MetaData, Table, exists, insert, select
+
+DESCRIPTION = "Store the decay fit of every user whose measurements predate the decay_fits table"
+
+BACKFILL_CHUNK_SIZE = 1000
+
+metadata = MetaData()
+
+measurements = Table(
+    "measurements",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("peak_level", Float(2)),
+    Column("time_elapsed", Float(2)),
+    Column("second_level_measurement", Float(2)),
+    Column("decay_constant", Float(2)),
+    Column("halving_time", Float(2)),
+)
+
+decay_fits = Table(
+    "decay_fits",
+    metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("measurement_count", Integer),
+    Column("sum_tt", Double),
+    Column("sum_ty", Double),
+    Column("sum_yy", Double),
+    Column("sum_decay_constant", Double),
+    Column("sum_decay_constant_sq", Double),
+    Column("sum_halving_time", Double),
+    Column("sum_halving_time_sq", Double),
+    Column("latest_measurement_id", Integer),
+)
+
+
+def decay_fit_terms(peak_level: float, measured_level: float, time_elapsed: float) -> Tuple[float, float, float]:
+    # Frozen copy of the fit terms at the time of this migration, so later changes to the app cannot alter it.
+    log_ratio = float(np.log(measured_level) - np.log(peak_level))
+    return time_elapsed * time_elapsed, time_elapsed * log_ratio, log_ratio * log_ratio
+
+
+def empty_fit(user_id: int) -> Dict[str, float]:
+    return {
+        "user_id": user_id,
+        "measurement_count": 0,
+        **{column.name: 0.0 for column in decay_fits.c if column.name.startswith("sum_")},
+        "latest_measurement_id": None,
+    }
+
+
+def upgrade(connection: Connection) -> None:
+    # A missing fit is computed again by every read without being stored, so it is stored here once. Users without
+    # measurements need none.
+    pending = (
+        select(measurements)
+        .where(~exists().where(decay_fits.c.user_id == measurements.c.user_id))
+        .order_by(measurements.c.user_id, measurements.c.id)
+    )
+    fits: Dict[int, Dict[str, float]] = {}
+    for measurement in connection.execute(pending):
+        if measurement.user_id not in fits:
+            fits[measurement.user_id] = empty_fit(measurement.user_id)
+        fit = fits[measurement.user_id]
+        sum_tt, sum_ty, sum_yy = decay_fit_terms(
+            measurement.peak_level, measurement.second_level_measurement, measurement.time_elapsed
+        )
+        fit["measurement_count"] += 1
+        fit["sum_tt"] += sum_tt
+        fit["sum_ty"] += sum_ty
+        fit["sum_yy"] += sum_yy
+        fit["sum_decay_constant"] += measurement.decay_constant
+        fit["sum_decay_constant_sq"] += measurement.decay_constant ** 2
+        fit["sum_halving_time"] += measurement.halving_time
+        fit["sum_halving_time_sq"] += measurement.halving_time ** 2
+        fit["latest_measurement_id"] = measurement.id
+
+    rows = list(fits.values())
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        connection.execute(insert(decay_fits), rows[start:start + BACKFILL_CHUNK_SIZE])
@@ -1,10 +1,17 @@
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from typing import Optional, Tuple
 
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Double, SmallInteger, Index
+from sqlalchemy.orm import relationship, validates
+
+from backend.src.common.utils import estimate_decay_constant
 from backend.src.database.database import Base
+from backend.src.levels.models import InfusionSchedule, InfusionTime
+from backend.src.levels.utils import parse_schedule
+
+MINUTES_PER_DAY = 24 * 60
 
 
 class User(Base):
@@ -15,17 +22,65 @@ class User(Base):
     last_name = Column(String(255), nullable=True)
     username = Column(String(255), unique=True, nullable=False)
     password = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=True)
+    email = Column(String(255), nullable=True, index=True)
     weekly_infusions = Column(String(1000), nullable=True)
     peak_level = Column(Float, nullable=False)
     measurements = relationship("Measurement", back_populates="user")
+    decay_fit = relationship("DecayFit", back_populates="user", uselist=False)
+    # Loaded with the user, the level computations read the schedule from here instead of parsing weekly_infusions.
+    infusions = relationship(
+        "UserInfusion",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+        order_by="(UserInfusion.weekday, UserInfusion.minute_of_day)",
+    )
+
+    @validates("weekly_infusions")
+    def validate_weekly_infusions(self, key: str, weekly_infusions: str | None) -> str | None:
+        # weekly_infusions stays as the text shown to the user, the numeric schedule is written in the same flush.
+        infusions = weekly_infusions.split(", ") if weekly_infusions else []
+        self.infusions = [
+            UserInfusion(weekday=weekday, minute_of_day=minute_of_day)
+            for weekday, minute_of_day in schedule_slots(parse_schedule(tuple(infusions)))
+        ]
+        return weekly_infusions
+
+    @property
+    def schedule(self) -> InfusionSchedule:
+        if not self.infusions and self.weekly_infusions:
+            # Text the migration could not parse, this raises the same error the computations always did.
+            return parse_schedule(tuple(self.weekly_infusions.split(", ")))
+        return InfusionSchedule(
+            infusions=tuple(
+                InfusionTime(
+                    weekday=infusion.weekday, minute_of_week=infusion.weekday * MINUTES_PER_DAY + infusion.minute_of_day
+                )
+                for infusion in self.infusions
+            )
+        )
+
+
+class UserInfusion(Base):
+    __tablename__ = "user_infusions"
+    __table_args__ = (Index("ix_user_infusions_weekday_minute_of_day", "weekday", "minute_of_day"),)
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    weekday = Column(SmallInteger, primary_key=True, autoincrement=False)
+    minute_of_day = Column(SmallInteger, primary_key=True, autoincrement=False)
+    user = relationship("User", back_populates="infusions")
+
+
+def schedule_slots(schedule: InfusionSchedule) -> list[tuple[int, int]]:
+    # (weekday, minute of the day) of each distinct infusion time, Monday is 0.
+    return [divmod(minute_of_week, MINUTES_PER_DAY) for minute_of_week in schedule.minutes_of_week()]
 
 
 class Measurement(Base):
     __tablename__ = "measurements"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     peak_level = Column(Float(2), nullable=False)
     time_elapsed = Column(Float(2), nullable=False)
     second_level_measurement = Column(Float(2), nullable=False)
@@ -35,10 +90,30 @@ class Measurement(Base):
     user = relationship("User", back_populates="measurements")
 
 
+class DecayFit(Base):
+    __tablename__ = "decay_fits"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    measurement_count = Column(Integer, nullable=False, default=0)
+    sum_tt = Column(Double, nullable=False, default=0.0)
+    sum_ty = Column(Double, nullable=False, default=0.0)
+    sum_yy = Column(Double, nullable=False, default=0.0)
+    # Running sums of the decay constants and halving times stored with the measurements, for their mean and spread.
+    sum_decay_constant = Column(Double, nullable=False, default=0.0)
+    sum_decay_constant_sq = Column(Double, nullable=False, default=0.0)
+    sum_halving_time = Column(Double, nullable=False, default=0.0)
+    sum_halving_time_sq = Column(Double, nullable=False, default=0.0)
+    latest_measurement_id = Column(Integer, nullable=True)
+    user = relationship("User", back_populates="decay_fit")
+
+    def estimate(self) -> Tuple[float, Optional[float]]:
+        return estimate_decay_constant(self.measurement_count, self.sum_tt, self.sum_ty, self.sum_yy)
+
+
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     token = Column(String(100), unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,74 @@
+import logging
+import traceback
+from contextlib import contextmanager, AsyncExitStack, ExitStack
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterator
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.src.core.config import DB_MAX_OVERFLOW
+
+logger = logging.getLogger("hem_tracker")
+
+
+class PoolMonitor:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @contextmanager
+    def timed_checkout(self) -> Iterator[None]:
+        started_at = monotonic()
+        try:
+            yield
+        except PoolTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        waited = monotonic() - started_at
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self) -> Dict[str, int | float]:
+        pool = self.engine.pool
+        with self._lock:
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # Negative while the pool has not opened all of its pool_size connections yet.
+                "overflow": pool.overflow(),
+                "max_overflow": DB_MAX_OVERFLOW,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "average_wait": self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_wait": self.max_wait_seconds,
+            }
+
+
+def warm_up_pool(engine: Engine, connections: int) -> None:
+    # Opens the connections the pool would otherwise open one by one under the first requests.
+    try:
+        with ExitStack() as stack:
+            for _ in range(connections):
+                stack.enter_context(engine.connect())
+    except Exception:
+        logger.error(f"Could not warm up the database pool: {traceback.format_exc()}")
+
+
+async def warm_up_async_pool(engine: AsyncEngine, connections: int) -> None:
+    try:
+        async with AsyncExitStack() as stack:
+            for _ in range(connections):
+                await stack.enter_async_context(engine.connect())
+    except Exception:
+        logger.error(f"Could not warm up the database pool: {traceback.format_exc()}")
@@ -0,0 +1,142 @@
+import logging
+import traceback
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.src.database import async_crud
+from backend.src.database.dependencies import get_async_db
+from backend.src.levels.router import LEVEL_RESPONSES, MIN_PLOT_POINTS, get_threshold_crossings
+from backend.src.levels.schemas import DefaultValues, LevelThresholdSettings, LevelCrossings, FactorLevelBands, \
+    UserLevels, DEFAULT_THRESHOLDS
+from backend.src.levels.service import materialized_user_levels, user_curve_inputs, user_level_bands, \
+    validate_percentiles, default_values_from_measurement, DEFAULT_USERNAME
+from backend.src.users.service import user_plot_data
+
+logger = logging.getLogger("hem_tracker")
+
+router = APIRouter(prefix="/api/levels", tags=["levels"], responses=LEVEL_RESPONSES)
+
+
+@router.get(
+    "/crossings/{username}",
+    response_model=LevelCrossings,
+    responses={404: {"description": "User not found"}, 500: {"description": "Could not compute. Server error."}},
+)
+async def get_user_threshold_crossings(
+    username: str,
+    thresholds: List[float] = Query(DEFAULT_THRESHOLDS, description="Factor levels (%) to report on."),
+    db: AsyncSession = Depends(get_async_db),
+) -> LevelCrossings:
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+    try:
+        user_data = user_plot_data(user, await async_crud.get_decay_fit(db, user.id))
+        settings = LevelThresholdSettings(
+            initial_factor_level=user_data.peak_level,
+            decay_constant=user_data.decay_constant,
+            weekly_infusions=user_data.weekly_infusions,
+            thresholds=thresholds,
+        )
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except Exception as exc:
+        logger.error(f"Error get user data user {username}: {str(exc)}")
+        raise HTTPException(status_code=500, detail="An error occurred while getting the user data")
+    return get_threshold_crossings(settings)
+
+
+@router.get(
+    "/user-levels/{username}",
+    response_model=UserLevels,
+    responses={
+        400: {"description": "No measurements"},
+        404: {"description": "User not found"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+async def get_user_levels_endpoint(
+    username: str,
+    current_time: str = Query(..., alias="currentTime", description="Current time, e.g. Monday 08:30 AM."),
+    max_points: int | None = Query(
+        None, ge=MIN_PLOT_POINTS, description="Downsample the curve to at most this many points, shape-preserving."
+    ),
+    db: AsyncSession = Depends(get_async_db),
+) -> UserLevels:
+    try:
+        user = await async_crud.get_user_by_username(db, username)
+        if not user:
+            raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+        inputs = user_curve_inputs(user, await async_crud.get_decay_fit(db, user.id))
+        return UserLevels(**materialized_user_levels(user.id, inputs, current_time, max_points))
+    except HTTPException:
+        raise
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not get the level curve of user {username}: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.get(
+    "/bands/{username}",
+    response_model=FactorLevelBands,
+    responses={
+        400: {"description": "Invalid percentiles or no measurements"},
+        404: {"description": "User not found"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+async def get_user_level_bands(
+    username: str,
+    current_time: str = Query(..., alias="currentTime", description="Current time, e.g. Monday 08:30 AM."),
+    percentiles: List[float] = Query([5.0, 50.0, 95.0], description="Percentiles (0-100) of the bands."),
+    max_points: int | None = Query(
+        None, ge=MIN_PLOT_POINTS, description="Downsample the curves to at most this many points, shape-preserving."
+    ),
+    db: AsyncSession = Depends(get_async_db),
+) -> FactorLevelBands:
+    try:
+        validate_percentiles(percentiles)
+        user = await async_crud.get_user_by_username(db, username)
+        if not user:
+            raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+        decay_fit = await async_crud.get_decay_fit(db, user.id)
+        # Evaluating all draws is the one heavy computation here, it must not stall the event loop.
+        bands = await run_in_threadpool(user_level_bands, user, decay_fit, current_time, percentiles, max_points)
+        return FactorLevelBands(**bands)
+    except HTTPException:
+        raise
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute level bands for user {username}: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.get(
+    "/default-values",
+    response_model=DefaultValues,
+)
+async def get_default_values(db: AsyncSession = Depends(get_async_db)) -> DefaultValues:
+    try:
+        user = await async_crud.get_user_by_username(db, DEFAULT_USERNAME)
+        if not user:
+            raise ValueError("Default user not found")
+        measurements = await async_crud.list_user_measurements(db, user.id, limit=1)
+        return default_values_from_measurement(user, next(iter(measurements), None))
+    except ValueError as exc:
+        logger.error(f"Error getting default values: {str(exc)}")
+        raise HTTPException(status_code=404, detail=str(exc))
+    except Exception as exc:
+        logger.error(f"Internal server error: {str(exc)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
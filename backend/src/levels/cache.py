@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .models import InfusionSchedule
+from ..core.config import LEVEL_CACHE_MAX_ENTRIES, LEVEL_CACHE_TTL_SECONDS
+
+
+class LevelCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, np.ndarray]] = OrderedDict()
+        self._week_start: Optional[datetime] = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, week_start: datetime) -> Optional[np.ndarray]:
+        with self._lock:
+            self._roll_over(week_start)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, levels = entry
+            if monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return levels
+
+    def put(self, key: Hashable, week_start: datetime, levels: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+
+        levels.setflags(write=False)
+        with self._lock:
+            self._roll_over(week_start)
+            self._entries[key] = (monotonic(), levels)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+    def _roll_over(self, week_start: datetime) -> None:
+        # Curves are anchored to the start of the week, so everything cached for the previous week is stale.
+        if self._week_start == week_start:
+            return
+        self.expirations += len(self._entries)
+        self._entries.clear()
+        self._week_start = week_start
+
+
+class DecayDrawCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[Hashable, np.ndarray]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, signature: Hashable) -> Optional[np.ndarray]:
+        # The signature identifies the measurements the draws came from, a new measurement changes it.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, signature: Hashable, draws: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+
+        draws.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (signature, draws)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def level_cache_key(
+    initial_factor_level: float, decay_constant: float, schedule: InfusionSchedule, week_start: datetime
+) -> Hashable:
+    return initial_factor_level, decay_constant, tuple(schedule.minutes_of_week()), week_start.isoformat()
+
+
+level_cache = LevelCache(max_entries=LEVEL_CACHE_MAX_ENTRIES, ttl=LEVEL_CACHE_TTL_SECONDS)
+decay_draw_cache = DecayDrawCache(max_entries=LEVEL_CACHE_MAX_ENTRIES)
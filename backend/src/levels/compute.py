@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from .engine import evaluate_levels, create_sample_minutes
+from .models import FactorCalculationParameters
+from ..common.exceptions import ComputeBusyError
+from ..core.config import COMPUTE_WORKERS, COMPUTE_MAX_PENDING, COMPUTE_INLINE_SAMPLES
+
+T = TypeVar("T")
+
+
+def warm_up() -> None:
+    # Runs the engine once, so the first real request does not pay for imports and first-call setup.
+    evaluate_levels(create_sample_minutes(0, 10), FactorCalculationParameters(50.0, -0.1, [0], 168))
+
+
+def timed(function: Callable[..., T], *args) -> Tuple[T, float]:
+    started_at = monotonic()
+    result = function(*args)
+    return result, monotonic() - started_at
+
+
+class ComputePool:
+    def __init__(self, workers: int, max_pending: int, inline_samples: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.inline_samples = inline_samples
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.inline = 0
+        self.busy_seconds = 0.0
+        self._started_at = monotonic()
+
+    def start(self) -> None:
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._started_at = monotonic()
+            executor = self._executor
+        # The pool only starts a process per submission that finds no idle one, one task per worker starts them all.
+        wait([executor.submit(warm_up) for _ in range(self.workers)])
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def run(self, samples: int, function: Callable[..., T], *args) -> T:
+        # Below the threshold pickling the arguments and the result costs more than the computation.
+        if self.workers <= 0 or samples < self.inline_samples:
+            with self._lock:
+                self.inline += 1
+            return function(*args)
+
+        if self._executor is None:
+            self.start()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ComputeBusyError()
+            self.pending += 1
+            self.submitted += 1
+            future = self._executor.submit(timed, function, *args)
+        try:
+            result, elapsed = future.result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+        with self._lock:
+            self.completed += 1
+            self.busy_seconds += elapsed
+        return result
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            uptime = monotonic() - self._started_at
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "inline_samples": self.inline_samples,
+                "pending": self.pending,
+                "busy_workers": min(self.pending, self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "inline": self.inline,
+                "utilization": self.busy_seconds / (uptime * self.workers) if self.workers and uptime else 0.0,
+            }
+
+
+compute_pool = ComputePool(
+    workers=COMPUTE_WORKERS, max_pending=COMPUTE_MAX_PENDING, inline_samples=COMPUTE_INLINE_SAMPLES
+)
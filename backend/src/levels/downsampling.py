@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, count: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, from every bucket in between, the point
+    # spanning the largest triangle with the point kept before it and the average of the next bucket.
+    n = len(x)
+    if count >= n or count < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, count - 1).astype(int)
+    sizes = np.diff(edges)
+    bucket = np.repeat(np.arange(count - 2), sizes)
+    points = np.arange(1, n - 1)
+    average_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / sizes
+    average_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / sizes
+    next_x = np.append(average_x[1:], x[-1])[bucket]
+    next_y = np.append(average_y[1:], y[-1])[bucket]
+
+    def select(previous_x: np.ndarray, previous_y: np.ndarray) -> np.ndarray:
+        previous_x, previous_y = previous_x[bucket], previous_y[bucket]
+        area = np.abs(
+            (previous_x - next_x) * (y[points] - previous_y) - (previous_x - x[points]) * (next_y - previous_y)
+        )
+        largest = np.maximum.reduceat(area, edges[:-1] - 1)
+        candidates = np.nonzero(area == largest[bucket])[0]
+        _, first = np.unique(bucket[candidates], return_index=True)
+        return points[candidates[first]]
+
+    # The point kept in the previous bucket makes the classic algorithm sequential. The first pass stands in the
+    # previous bucket's average for it, the second pass uses the first pass's choice, both as whole-array operations.
+    chosen = select(np.append(x[0], average_x[:-1]), np.append(y[0], average_y[:-1]))
+    chosen = select(np.append(x[0], x[chosen[:-1]]), np.append(y[0], y[chosen[:-1]]))
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def downsample_indices(hours: np.ndarray, levels: np.ndarray, max_points: int) -> np.ndarray:
+    if max_points >= len(hours):
+        return np.arange(len(hours))
+
+    # Both ends of every infusion jump are kept so the curve still shows the trough and the peak, LTTB spends the
+    # rest of the budget on the smooth decay in between.
+    jumps = np.nonzero(np.diff(levels) > 0)[0]
+    anchors = np.unique(np.concatenate(([0, len(hours) - 1], jumps, jumps + 1)))
+    if len(anchors) + 1 > max_points:
+        return lttb_indices(hours, levels, max_points)
+    return np.union1d(anchors, lttb_indices(hours, levels, max_points - len(anchors) + 2))
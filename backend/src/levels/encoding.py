@@ -0,0 +1,112 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .engine import SAMPLE_STEP
+from .models import WeekLevels
+from ..common.exceptions import NotAcceptableError
+
+JSON_MEDIA_TYPE = "application/json"
+COMPACT_MEDIA_TYPE = "application/vnd.hem-tracker.compact+json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+LEVEL_MEDIA_TYPES = (JSON_MEDIA_TYPE, COMPACT_MEDIA_TYPE, BINARY_MEDIA_TYPE)
+DEFAULT_LEVEL_PRECISION = 2
+
+BINARY_HEADERS = [
+    "X-Hours-Start",
+    "X-Hours-Step",
+    "X-Hours-Count",
+    "X-Start-Of-Week",
+    "X-Current-Time",
+    "X-Current-Factor-Level",
+    "X-Halving-Time",
+]
+
+
+def negotiate_level_encoding(accept: str | None) -> str:
+    if not accept or not accept.strip():
+        return JSON_MEDIA_TYPE
+
+    ranges = parse_accept(accept)
+    # Each encoding takes the weight of its most specific matching range. Ties go to the range listed first, then to
+    # the order of LEVEL_MEDIA_TYPES.
+    ranked = []
+    for preference, media_type in enumerate(LEVEL_MEDIA_TYPES):
+        matches = [
+            (specificity, -position, weight)
+            for position, (media_range, weight) in enumerate(ranges)
+            if (specificity := media_range_specificity(media_range, media_type)) is not None
+        ]
+        if matches:
+            specificity, position, weight = max(matches)
+            ranked.append((weight, specificity, position, -preference, media_type))
+
+    acceptable = [rank for rank in ranked if rank[0] > 0]
+    if not acceptable:
+        raise NotAcceptableError(f"Factor levels are available as {', '.join(LEVEL_MEDIA_TYPES)}")
+    return max(acceptable)[-1]
+
+
+def parse_accept(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media_range, *parameters = (item.strip() for item in part.split(";"))
+        if not media_range:
+            continue
+        weight = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    weight = 0.0
+        ranges.append((media_range.lower(), weight))
+    return ranges
+
+
+def media_range_specificity(media_range: str, media_type: str) -> int | None:
+    if media_range == media_type:
+        return 2
+    if media_range == f"{media_type.split('/')[0]}/*":
+        return 1
+    if media_range == "*/*":
+        return 0
+    return None
+
+
+def encode_compact_levels(week: WeekLevels, precision: int = DEFAULT_LEVEL_PRECISION) -> Dict[str, object]:
+    # Downsampled hours are no longer evenly spaced and are sent as they are.
+    hours = week.hours if week.downsampled else {"start": week.hours[0], "step": SAMPLE_STEP, "count": len(week.hours)}
+    return {
+        "hours": hours,
+        "start_of_week": week.start_of_week.isoformat(),
+        "levels": np.round(week.levels, precision).tolist(),
+        "current_time": week.current_time.isoformat(),
+        "current_factor_level": week.current_factor_level,
+        "halving_time": week.halving_time,
+    }
+
+
+def encode_binary_levels(week: WeekLevels) -> bytes:
+    # Little-endian float32, readable in the browser with `new Float32Array(await response.arrayBuffer())`.
+    # Downsampled curves send their X-Hours-Count hours first, followed by the levels.
+    if week.downsampled:
+        return np.concatenate((week.hours, week.levels)).astype("<f4").tobytes()
+    return week.levels.astype("<f4").tobytes()
+
+
+def binary_level_headers(week: WeekLevels) -> Dict[str, str]:
+    current_hour, current_factor_level = week.current_factor_level
+    headers = {
+        "X-Hours-Start": repr(week.hours[0]),
+        "X-Hours-Step": repr(SAMPLE_STEP),
+        "X-Hours-Count": str(len(week.hours)),
+        "X-Start-Of-Week": week.start_of_week.isoformat(),
+        "X-Current-Time": week.current_time.isoformat(),
+        "X-Current-Factor-Level": f"{current_hour!r},{current_factor_level!r}",
+        "X-Halving-Time": repr(week.halving_time),
+    }
+    if week.downsampled:
+        del headers["X-Hours-Step"]
+    return headers
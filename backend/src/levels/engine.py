@@ -0,0 +1,224 @@
+from math import exp
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .models import FactorCalculationParameters
+
+# Time is kept in integer minutes since the start of the week. Samples and infusions are compared and indexed
+# as integers, hours are only derived for the exponent and for the response.
+MINUTES_PER_HOUR = 60
+SAMPLE_MINUTES = 6
+SAMPLE_STEP = SAMPLE_MINUTES / MINUTES_PER_HOUR
+CHUNK_SAMPLES = 1680
+
+
+def minutes_to_hours(minutes) -> np.ndarray:
+    return np.asarray(minutes) / MINUTES_PER_HOUR
+
+
+def create_sample_minutes(start: int, stop: int, step_minutes: int = SAMPLE_MINUTES) -> np.ndarray:
+    return np.arange(start, stop, dtype=np.int64) * step_minutes
+
+
+def nearest_sample(minutes, step_minutes: int = SAMPLE_MINUTES) -> np.ndarray:
+    # Ties go to the even sample, the same as rounding a half-way hour to one decimal.
+    return np.round(np.asarray(minutes) / step_minutes).astype(np.int64)
+
+
+def sorted_refill_minutes(refill_minutes) -> np.ndarray:
+    # Infusions are moved onto the 6-minute grid whatever step the levels are sampled at, the output step only
+    # decides where the curve is read and never moves an infusion.
+    return np.unique(nearest_sample(refill_minutes) * SAMPLE_MINUTES)
+
+
+def count_weeks(minutes: np.ndarray, week_duration: int) -> int:
+    if not len(minutes):
+        return 1
+    return max(1, int(np.max(minutes) // (week_duration * MINUTES_PER_HOUR)) + 1)
+
+
+def repeat_refills(refill_minutes: np.ndarray, week_duration: int, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+    # The weekly schedule repeats for every week of the horizon. Segment 0 is the decay left over from the last
+    # infusion of the previous week, segment i + 1 starts at the i-th infusion; references are the segment starts.
+    week_offsets = week_duration * MINUTES_PER_HOUR * np.arange(weeks, dtype=np.int64)
+    refills = (refill_minutes[None, :] + week_offsets[:, None]).ravel()
+
+    references = np.empty(len(refills) + 1)
+    references[1:] = minutes_to_hours(refills)
+    references[0] = references[len(refill_minutes)] - week_duration
+    return refills, references
+
+
+def calculate_refill_peaks(
+    refill_minutes: np.ndarray,
+    params: FactorCalculationParameters,
+    weeks: int = 1,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Each peak is the infused dose plus what is left of the previous segment one 6-minute sample before the
+    # infusion, independent of the step the levels are read at.
+    refills, references = repeat_refills(refill_minutes, params.week_duration, weeks)
+    refill_hours = references[1:]
+
+    peaks = np.empty(len(refills) + 1)
+    peaks[0] = params.initial_factor_level
+
+    peak_value = params.initial_factor_level
+    reference = references[0]
+    for i, refill_hour in enumerate(refill_hours.tolist()):
+        previous_level = peak_value * exp(params.decay_constant * ((refill_hour - SAMPLE_STEP) - reference))
+        peak_value = params.initial_factor_level + previous_level
+        reference = refill_hour
+        peaks[i + 1] = peak_value
+
+    return refills, peaks, references
+
+
+def evaluate_levels(minutes: np.ndarray, params: FactorCalculationParameters) -> np.ndarray:
+    return evaluate_levels_batch(minutes, [params])[0]
+
+
+def evaluate_levels_batch(minutes: np.ndarray, scenarios: List[FactorCalculationParameters]) -> np.ndarray:
+    minutes = np.asarray(minutes, dtype=np.int64)
+    hours = minutes_to_hours(minutes)
+    levels = np.zeros((len(scenarios), len(minutes)))
+    rows = [row for row, params in enumerate(scenarios) if len(params.refill_minutes)]
+    if not rows:
+        return levels
+
+    tables = [
+        calculate_refill_peaks(
+            sorted_refill_minutes(scenarios[row].refill_minutes),
+            scenarios[row],
+            weeks=count_weeks(minutes, scenarios[row].week_duration),
+        )
+        for row in rows
+    ]
+    width = max(len(refills) for refills, _, _ in tables)
+
+    # Scenarios have different numbers of infusions, so the per-scenario tables are padded to the widest one.
+    # Padding is never selected because segment indices stay within each scenario's own infusions.
+    refills = np.full((len(rows), width), np.iinfo(np.int64).max)
+    peaks = np.zeros((len(rows), width + 1))
+    references = np.zeros((len(rows), width + 1))
+    segments = np.empty((len(rows), len(minutes)), dtype=np.intp)
+    for i, (scenario_refills, scenario_peaks, scenario_references) in enumerate(tables):
+        count = len(scenario_refills)
+        refills[i, :count] = scenario_refills
+        peaks[i, : count + 1] = scenario_peaks
+        references[i, : count + 1] = scenario_references
+        segments[i] = np.searchsorted(scenario_refills, minutes, side="right")
+
+    initial_levels = np.array([scenarios[row].initial_factor_level for row in rows])[:, None]
+    decay_constants = np.array([scenarios[row].decay_constant for row in rows])[:, None]
+
+    previous_refills = np.take_along_axis(refills, np.maximum(segments - 1, 0), axis=1)
+    is_refill = (segments > 0) & (minutes == previous_refills)
+
+    # A sample that falls exactly on an infusion is the infused dose added on top of the previous segment,
+    # evaluated one 6-minute sample earlier.
+    source = np.where(is_refill, segments - 1, segments)
+    source_references = np.take_along_axis(references, source, axis=1)
+    offsets = np.where(is_refill, (hours - SAMPLE_STEP) - source_references, hours - source_references)
+    # np.exp may round a few ulp away from the scalar math.exp of the original loop, so levels match it to a
+    # relative 1e-14 rather than bit for bit.
+    values = np.take_along_axis(peaks, source, axis=1) * np.exp(decay_constants * offsets)
+    levels[rows] = np.where(is_refill, initial_levels + values, values)
+    return levels
+
+
+def evaluate_levels_at(hours: np.ndarray, params: FactorCalculationParameters) -> np.ndarray:
+    # Levels at arbitrary instants of the week, straight from the last infusion before each of them. The peaks
+    # are the ones the sampled curve uses, so both agree on the sample grid.
+    hours = np.asarray(hours, dtype=float)
+    if not len(params.refill_minutes):
+        return np.zeros(len(hours))
+
+    _, peaks, references = calculate_refill_peaks(sorted_refill_minutes(params.refill_minutes), params)
+    segments = np.searchsorted(references[1:], hours, side="right")
+    return peaks[segments] * np.exp(params.decay_constant * (hours - references[segments]))
+
+
+def evaluate_decay_draws(
+    minutes: np.ndarray,
+    params: FactorCalculationParameters,
+    decay_constants: np.ndarray,
+) -> np.ndarray:
+    # One schedule under many decay constants: the segment lookup is shared by all rows, only the peaks and the
+    # exponent differ, so the whole (draws x samples) matrix is a single broadcast.
+    minutes = np.asarray(minutes, dtype=np.int64)
+    decay_constants = np.asarray(decay_constants, dtype=float)[:, None]
+    if not len(params.refill_minutes):
+        return np.zeros((len(decay_constants), len(minutes)))
+
+    refills, references = repeat_refills(
+        sorted_refill_minutes(params.refill_minutes),
+        params.week_duration,
+        count_weeks(minutes, params.week_duration),
+    )
+    hours = minutes_to_hours(minutes)
+
+    peaks = np.empty((len(decay_constants), len(refills) + 1))
+    peaks[:, 0] = params.initial_factor_level
+    for i in range(len(refills)):
+        remaining = np.exp(decay_constants[:, 0] * ((references[i + 1] - SAMPLE_STEP) - references[i]))
+        peaks[:, i + 1] = params.initial_factor_level + peaks[:, i] * remaining
+
+    segments = np.searchsorted(refills, minutes, side="right")
+    is_refill = (segments > 0) & (minutes == refills[np.maximum(segments - 1, 0)])
+    source = np.where(is_refill, segments - 1, segments)
+    offsets = np.where(is_refill, (hours - SAMPLE_STEP) - references[source], hours - references[source])
+    values = peaks[:, source] * np.exp(decay_constants * offsets)
+    return np.where(is_refill, params.initial_factor_level + values, values)
+
+
+def iterate_levels(
+    params: FactorCalculationParameters,
+    horizon: float,
+    step_minutes: int = SAMPLE_MINUTES,
+    chunk_samples: int = CHUNK_SAMPLES,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    samples = -(-round(horizon * MINUTES_PER_HOUR) // step_minutes)
+    for start in range(0, samples, chunk_samples):
+        minutes = create_sample_minutes(start, min(start + chunk_samples, samples), step_minutes)
+        yield minutes_to_hours(minutes), evaluate_levels(minutes, params)
+
+
+def calculate_threshold_crossings(
+    params: FactorCalculationParameters, thresholds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Returns (threshold index, hour, rising) for every crossing in the week, solved per segment instead of
+    # searched on the sample grid.
+    if not len(params.refill_minutes):
+        return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=bool)
+
+    refill_minutes = sorted_refill_minutes(params.refill_minutes)
+    _, peaks, references = calculate_refill_peaks(refill_minutes, params)
+    refills = minutes_to_hours(refill_minutes)
+    starts = np.concatenate(([0.0], refills))
+    ends = np.concatenate((refills, [float(params.week_duration)]))
+    levels = thresholds[:, None]
+
+    indices, hours, rising = [], [], []
+    if params.decay_constant != 0:
+        # Within a segment the level is peak * exp(k * (t - reference)), which meets the threshold exactly once.
+        segment_hours = references + np.log(levels / peaks) / params.decay_constant
+        inside = (segment_hours > starts) & (segment_hours < ends)
+        threshold_index, segment = np.nonzero(inside)
+        indices.append(threshold_index)
+        hours.append(segment_hours[threshold_index, segment])
+        rising.append(np.full(len(segment), params.decay_constant > 0))
+
+    # Infusions make the level jump, which crosses every threshold between the level before and after.
+    before = peaks[:-1] * np.exp(params.decay_constant * (refills - references[:-1]))
+    after = peaks[1:]
+    jumps = ((before < levels) & (after >= levels)) | ((before >= levels) & (after < levels))
+    jumps &= refills < params.week_duration
+    threshold_index, refill = np.nonzero(jumps)
+    indices.append(threshold_index)
+    hours.append(refills[refill])
+    rising.append(after[refill] >= before[refill])
+
+    indices, hours, rising = np.concatenate(indices), np.concatenate(hours), np.concatenate(rising)
+    order = np.lexsort((hours, indices))
+    return indices[order], hours[order], rising[order]
@@ -0,0 +1,95 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+
+from .models import UserCurve, UserCurveInputs
+from ..core.config import USER_CURVE_MAX_ENTRIES, USER_CURVE_TTL_SECONDS, USER_CURVE_WORKERS
+
+logger = logging.getLogger("hem_tracker")
+
+
+class UserCurveStore:
+    def __init__(self, workers: int, max_entries: int, ttl: float):
+        self.workers = workers
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._curves: OrderedDict[int, Tuple[float, UserCurve]] = OrderedDict()
+        self._pending: Dict[int, UserCurveInputs] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, user_id: int, inputs: UserCurveInputs) -> Optional[UserCurve]:
+        # A curve computed from other inputs is stale, e.g. when the user was changed by another process.
+        with self._lock:
+            entry = self._curves.get(user_id)
+            if entry is None:
+                return None
+            if monotonic() - entry[0] > self.ttl:
+                del self._curves[user_id]
+                self.expirations += 1
+                return None
+            self._curves.move_to_end(user_id)
+        curve = entry[1]
+        return curve if curve.inputs == inputs else None
+
+    def put(self, user_id: int, curve: UserCurve) -> None:
+        with self._lock:
+            self._store(user_id, curve)
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._curves.pop(user_id, None)
+            self._pending.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            return {
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._curves),
+                "pending": len(self._pending),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+    def submit(self, user_id: int, inputs: UserCurveInputs, compute: Callable[[UserCurveInputs], UserCurve]) -> None:
+        with self._lock:
+            if self._pending.get(user_id) == inputs:
+                return
+            self._pending[user_id] = inputs
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="user-curves")
+            future = self._executor.submit(compute, inputs)
+        future.add_done_callback(lambda done: self._finish(user_id, inputs, done))
+
+    def _finish(self, user_id: int, inputs: UserCurveInputs, future: Future) -> None:
+        if future.exception() is not None:
+            logger.error(f"Could not materialize the level curve of user {user_id}: {future.exception()!r}")
+
+        with self._lock:
+            # A newer submission for the same user wins, an older result finishing late must not replace it.
+            if self._pending.get(user_id) != inputs:
+                return
+            del self._pending[user_id]
+            if future.exception() is None:
+                self._store(user_id, future.result())
+
+    def _store(self, user_id: int, curve: UserCurve) -> None:
+        # Bounded like the level cache, a user who has not been viewed for a while is computed again on demand.
+        if self.max_entries <= 0:
+            return
+        self._curves[user_id] = (monotonic(), curve)
+        self._curves.move_to_end(user_id)
+        while len(self._curves) > self.max_entries:
+            self._curves.popitem(last=False)
+            self.evictions += 1
+
+
+user_curve_store = UserCurveStore(
+    workers=USER_CURVE_WORKERS, max_entries=USER_CURVE_MAX_ENTRIES, ttl=USER_CURVE_TTL_SECONDS
+)
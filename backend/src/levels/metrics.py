@@ -0,0 +1,56 @@
+from typing import Dict
+
+import numpy as np
+
+# Closed-form steady state of the single-exponential model: after every infusion the level is
+# peak * exp(decay_constant * t) until the next one, where the dose is added on top of what is left.
+# Every function accepts leading batch dimensions, so many schedules can be evaluated at once.
+
+
+def infusion_intervals(refill_hours: np.ndarray, week_duration: float) -> np.ndarray:
+    following = np.roll(refill_hours, -1, axis=-1)
+    following[..., -1] += week_duration
+    return following - refill_hours
+
+
+def steady_state_peaks(intervals: np.ndarray, dose, decay_constant) -> np.ndarray:
+    dose = np.asarray(dose, dtype=float)[..., None]
+    remaining = np.exp(np.asarray(decay_constant, dtype=float)[..., None] * intervals)
+
+    # The level carried into the first infusion is affine in itself after one week:
+    # carried = carried_from_zero + carried * exp(decay_constant * week), so it can be solved directly.
+    carried = np.zeros(np.broadcast_shapes(dose.shape[:-1], intervals.shape[:-1]))
+    for i in range(intervals.shape[-1]):
+        carried = (dose[..., 0] + carried) * remaining[..., i]
+    carried = carried / (1 - np.prod(remaining, axis=-1))
+
+    peaks = np.empty(carried.shape + intervals.shape[-1:])
+    for i in range(intervals.shape[-1]):
+        peaks[..., i] = dose[..., 0] + carried
+        carried = peaks[..., i] * remaining[..., i]
+    return peaks
+
+
+def hours_below(peaks: np.ndarray, intervals: np.ndarray, decay_constant, thresholds: np.ndarray) -> np.ndarray:
+    decay_constant = np.asarray(decay_constant, dtype=float)[..., None, None]
+    # Time after the infusion at which the level reaches the threshold, clipped to the interval.
+    crossings = np.log(thresholds / peaks[..., None]) / decay_constant
+    below = np.clip(intervals[..., None] - crossings, 0, intervals[..., None])
+    return below.sum(axis=-2)
+
+
+def calculate_steady_state_metrics(
+    refill_hours: np.ndarray, dose, decay_constant, week_duration: float, thresholds: np.ndarray
+) -> Dict[str, np.ndarray]:
+    intervals = infusion_intervals(refill_hours, week_duration)
+    peaks = steady_state_peaks(intervals, dose, decay_constant)
+    troughs = peaks * np.exp(np.asarray(decay_constant, dtype=float)[..., None] * intervals)
+    auc = ((troughs - peaks) / np.asarray(decay_constant, dtype=float)[..., None]).sum(axis=-1)
+
+    return {
+        "trough": troughs.min(axis=-1),
+        "peak": peaks.max(axis=-1),
+        "auc": auc,
+        "average_level": auc / week_duration,
+        "time_below": hours_below(peaks, intervals, decay_constant, thresholds),
+    }
@@ -1,10 +1,50 @@
 from dataclasses import dataclass
-from typing import List
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 
 @dataclass
 class FactorCalculationParameters:
     initial_factor_level: float
     decay_constant: float
-    refill_hours: List[float]
+    refill_minutes: List[int]
     week_duration: int
+
+
+@dataclass
+class WeekLevels:
+    hours: List[float]
+    start_of_week: datetime
+    levels: np.ndarray
+    current_time: datetime
+    current_factor_level: List[float]
+    halving_time: float
+    downsampled: bool = False
+
+
+class UserCurveInputs(NamedTuple):
+    initial_factor_level: float
+    decay_constant: float
+    refill_minutes: Tuple[int, ...]
+
+
+@dataclass
+class UserCurve:
+    inputs: UserCurveInputs
+    levels: np.ndarray
+    metrics: Optional[Dict[str, object]]
+
+
+class InfusionTime(NamedTuple):
+    weekday: int
+    minute_of_week: int
+
+
+@dataclass(frozen=True)
+class InfusionSchedule:
+    infusions: Tuple[InfusionTime, ...]
+
+    def minutes_of_week(self) -> List[int]:
+        return sorted({infusion.minute_of_week for infusion in self.infusions})
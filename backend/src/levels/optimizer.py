@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+from math import comb
+from threading import Lock
+from time import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .engine import minutes_to_hours
+from .metrics import calculate_steady_state_metrics
+from ..core.config import SCHEDULE_SEARCH_WORKERS
+
+SEARCH_BATCH_SIZE = 4096
+POOL_CANDIDATE_THRESHOLD = 200_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def get_search_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SCHEDULE_SEARCH_WORKERS)
+        return _pool
+
+
+def shutdown_search_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def iterate_candidates(slot_count: int, infusions: int, first_slots: Sequence[int]) -> Iterator[Tuple[int, ...]]:
+    for first in first_slots:
+        for rest in combinations(range(first + 1, slot_count), infusions - 1):
+            yield (first,) + rest
+
+
+def score_candidates(
+    schedules: np.ndarray, dose: float, decay_constant: float, week_duration: float, threshold: Optional[float]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    thresholds = np.array([threshold if threshold is not None else 1.0])
+    metrics = calculate_steady_state_metrics(
+        minutes_to_hours(schedules), dose, decay_constant, week_duration, thresholds
+    )
+    hours_below = metrics["time_below"][:, 0]
+    # Higher is better: either the trough itself or the negated time spent below the threshold.
+    scores = metrics["trough"] if threshold is None else -hours_below
+    return scores, metrics["trough"], metrics["peak"], hours_below
+
+
+def keep_best(
+    best: Tuple[np.ndarray, np.ndarray], scores: np.ndarray, schedules: np.ndarray, top: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    scores = np.concatenate((best[0], scores))
+    schedules = np.concatenate((best[1], schedules))
+    order = np.argsort(-scores, kind="stable")[:top]
+    return scores[order], schedules[order]
+
+
+def search_schedules(
+    slots: np.ndarray,
+    infusions: int,
+    first_slots: Sequence[int],
+    dose: float,
+    decay_constant: float,
+    week_duration: float,
+    threshold: Optional[float],
+    top: int,
+    deadline: float,
+) -> Tuple[np.ndarray, np.ndarray, int, bool]:
+    best = np.empty(0), np.empty((0, infusions), dtype=slots.dtype)
+    evaluated = 0
+    candidates = iterate_candidates(len(slots), infusions, first_slots)
+    while True:
+        if time() >= deadline:
+            return best[0], best[1], evaluated, False
+
+        batch = list(islice(candidates, SEARCH_BATCH_SIZE))
+        if not batch:
+            return best[0], best[1], evaluated, True
+
+        schedules = slots[np.array(batch)]
+        scores, _, _, _ = score_candidates(schedules, dose, decay_constant, week_duration, threshold)
+        best = keep_best(best, scores, schedules, top)
+        evaluated += len(batch)
+
+
+def optimize_schedule(
+    slots: np.ndarray,
+    infusions: int,
+    dose: float,
+    decay_constant: float,
+    week_duration: float,
+    threshold: Optional[float],
+    top: int,
+    time_budget: float,
+) -> Tuple[List[dict], int, int, bool]:
+    deadline = time() + time_budget
+    total = comb(len(slots), infusions)
+    first_slots = list(range(len(slots) - infusions + 1))
+    arguments = (infusions, dose, decay_constant, week_duration, threshold, top, deadline)
+
+    if total > POOL_CANDIDATE_THRESHOLD and SCHEDULE_SEARCH_WORKERS > 1:
+        # Round-robin over the first infusion slot keeps the workers' shares of the space roughly even.
+        shares = [first_slots[worker::SCHEDULE_SEARCH_WORKERS] for worker in range(SCHEDULE_SEARCH_WORKERS)]
+        futures = [
+            get_search_pool().submit(search_schedules, slots, arguments[0], share, *arguments[1:])
+            for share in shares
+            if share
+        ]
+        results = [future.result() for future in futures]
+    else:
+        results = [search_schedules(slots, arguments[0], first_slots, *arguments[1:])]
+
+    best = np.empty(0), np.empty((0, infusions), dtype=slots.dtype)
+    evaluated, complete = 0, True
+    for scores, schedules, worker_evaluated, worker_complete in results:
+        best = keep_best(best, scores, schedules, top)
+        evaluated += worker_evaluated
+        complete &= worker_complete
+
+    schedules = best[1]
+    _, troughs, peaks, hours_below = score_candidates(schedules, dose, decay_constant, week_duration, threshold)
+    ranked = [
+        {"refill_minutes": schedule, "trough": trough, "peak": peak, "hours_below": below}
+        for schedule, trough, peak, below in zip(schedules.tolist(), troughs.tolist(), peaks.tolist(),
+                                                 hours_below.tolist())
+    ]
+    return ranked, evaluated, total, complete
@@ -1,48 +1,324 @@
 import logging
 import traceback
-from typing import Dict
+from typing import Dict, List
 
+from pydantic import ValidationError, conlist
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from starlette.requests import Request
+from starlette.responses import StreamingResponse, Response, JSONResponse
 
 from backend.src.common.utils import calculate_decay_constant
 from backend.src.database.dependencies import get_db
+from backend.src.levels.cache import level_cache
+from backend.src.levels.compute import compute_pool
+from backend.src.levels.encoding import negotiate_level_encoding, encode_binary_levels, binary_level_headers, \
+    encode_compact_levels, BINARY_MEDIA_TYPE, COMPACT_MEDIA_TYPE, DEFAULT_LEVEL_PRECISION
+from backend.src.levels.materialized import user_curve_store
 from backend.src.levels.schemas import FactorLevelSettings, DefaultValues, FactorLevels, DecayConstantParameters, \
-    DecayConstant
-from backend.src.levels.service import calculate_factor_levels, get_values_for_default_user
+    DecayConstant, FactorLevelsBatch, FactorLevelProjectionSettings, LevelCacheStats, LevelMetricsSettings, \
+    LevelMetrics, LevelThresholdSettings, LevelCrossings, ScheduleSearchSettings, ScheduleSearchResult, \
+    FactorLevelBands, LevelsAtSettings, LevelsAt, UserLevels, ComputePoolStats, UserCurveStats, DEFAULT_THRESHOLDS
+from backend.src.levels.service import calculate_factor_levels, get_values_for_default_user, \
+    calculate_factor_levels_batch, stream_factor_levels, compute_week_levels, calculate_level_metrics, \
+    find_threshold_crossings, search_infusion_schedules, calculate_user_level_bands, calculate_levels_at, \
+    get_user_levels
+from backend.src.users.service import get_user_plot_data
 
 logger = logging.getLogger("hem_tracker")
 
-router = APIRouter(
-    prefix="/api/levels",
-    tags=["levels"],
+MAX_BATCH_SCENARIOS = 100
+MIN_PLOT_POINTS = 10
+
+LEVEL_RESPONSES = {
+    200: {"decription": "Successfully retrieved default values"},
+    400: {"description": "Bad Request"},
+    403: {"description": "Operation forbidden"},
+    422: {"description": "Validation Error - Invalid request format"},
+    500: {"description": "Internal Server Error - Calculating levels service error"},
+}
+
+router = APIRouter(prefix="/api/levels", tags=["levels"], responses=LEVEL_RESPONSES)
+
+# Endpoints that read from the database, levels.async_router serves them instead when the async path is enabled.
+user_router = APIRouter(prefix="/api/levels", tags=["levels"], responses=LEVEL_RESPONSES)
+
+
+@router.post(
+    "/update-levels",
+    response_model=FactorLevels,
     responses={
-        200: {"decription": "Successfully retrieved default values"},
-        400: {"description": "Bad Request"},
+        200: {
+            "content": {
+                COMPACT_MEDIA_TYPE: {},
+                BINARY_MEDIA_TYPE: {},
+            },
+            "description": "Factor levels, encoded according to the Accept header",
+        },
         403: {"description": "Operation forbidden"},
-        422: {"description": "Validation Error - Invalid request format"},
-        500: {"description": "Internal Server Error - Calculating levels service error"},
+        406: {"description": "None of the accepted media types can be produced"},
+        500: {"description": "Could not compute. Server error."},
     },
 )
+def get_factor_levels(
+    settings: FactorLevelSettings,
+    request: Request,
+    precision: int = Query(DEFAULT_LEVEL_PRECISION, ge=0, le=15, description="Decimals kept in compact responses."),
+    max_points: int | None = Query(
+        None, ge=MIN_PLOT_POINTS, description="Downsample the curve to at most this many points, shape-preserving."
+    ),
+) -> Dict[str, str] | Response:
+    try:
+        encoding = negotiate_level_encoding(request.headers.get("accept"))
+        if encoding == BINARY_MEDIA_TYPE:
+            week = compute_week_levels(settings, max_points)
+            return Response(
+                content=encode_binary_levels(week), media_type=BINARY_MEDIA_TYPE, headers=binary_level_headers(week)
+            )
+        if encoding == COMPACT_MEDIA_TYPE:
+            week = compute_week_levels(settings, max_points)
+            return JSONResponse(content=encode_compact_levels(week, precision), media_type=COMPACT_MEDIA_TYPE)
+
+        result = calculate_factor_levels(settings, max_points)
+        return result
+    except HTTPException:
+        raise
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    except Exception:
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
 
 
 @router.post(
-    "/update-levels",
-    response_model=FactorLevels,
+    "/update-levels/batch",
+    response_model=FactorLevelsBatch,
     responses={403: {"description": "Operation forbidden"}, 500: {"description": "Could not compute. Server error."}},
 )
-def get_factor_levels(settings: FactorLevelSettings) -> Dict[str, str]:
+def get_factor_levels_batch(
+    scenarios: conlist(item_type=FactorLevelSettings, min_length=1, max_length=MAX_BATCH_SCENARIOS),
+) -> Dict[str, object]:
     try:
-        result = calculate_factor_levels(settings)
+        result = calculate_factor_levels_batch(scenarios)
         return result
+    except HTTPException:
+        raise
     except ValueError as exc:
         raise HTTPException(status_code=500, detail=str(exc))
     except Exception:
-        print(traceback.format_exc())
+        logger.error(f"Could not compute batch factor levels: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.post(
+    "/update-levels/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "Header line followed by level chunks"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+def get_factor_levels_stream(settings: FactorLevelProjectionSettings) -> StreamingResponse:
+    try:
+        lines = stream_factor_levels(settings)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    except ValueError as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute factor level projection: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.post(
+    "/at",
+    response_model=LevelsAt,
+    responses={400: {"description": "Invalid timestamp"}, 500: {"description": "Could not compute. Server error."}},
+)
+def get_levels_at(settings: LevelsAtSettings) -> LevelsAt:
+    try:
+        return LevelsAt(**calculate_levels_at(settings))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute levels at timestamps: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Could not compute. Server error.")
 
 
 @router.get(
+    "/at",
+    response_model=LevelsAt,
+    responses={400: {"description": "Invalid timestamp"}, 500: {"description": "Could not compute. Server error."}},
+)
+def get_levels_at_query(
+    peak_level: float = Query(..., alias="peakLevel"),
+    decay_constant: float = Query(..., alias="decayConstant"),
+    weekly_infusions: List[str] = Query(..., alias="weeklyInfusions"),
+    timestamps: List[str] = Query([], description="ISO 8601 timestamps to evaluate. Defaults to now."),
+) -> LevelsAt:
+    try:
+        settings = LevelsAtSettings(
+            initial_factor_level=peak_level,
+            decay_constant=decay_constant,
+            weekly_infusions=weekly_infusions,
+            timestamps=timestamps,
+        )
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return get_levels_at(settings)
+
+
+@router.post(
+    "/metrics",
+    response_model=LevelMetrics,
+    responses={
+        400: {"description": "Invalid infusion schedule"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+def get_level_metrics(settings: LevelMetricsSettings) -> LevelMetrics:
+    try:
+        metrics = calculate_level_metrics(settings)
+        return LevelMetrics(**metrics)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute level metrics: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.post(
+    "/crossings",
+    response_model=LevelCrossings,
+    responses={500: {"description": "Could not compute. Server error."}},
+)
+def get_threshold_crossings(settings: LevelThresholdSettings) -> LevelCrossings:
+    try:
+        crossings = find_threshold_crossings(settings)
+        return LevelCrossings(**crossings)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute threshold crossings: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@user_router.get(
+    "/crossings/{username}",
+    response_model=LevelCrossings,
+    responses={404: {"description": "User not found"}, 500: {"description": "Could not compute. Server error."}},
+)
+def get_user_threshold_crossings(
+    username: str,
+    thresholds: List[float] = Query(DEFAULT_THRESHOLDS, description="Factor levels (%) to report on."),
+    db: Session = Depends(get_db),
+) -> LevelCrossings:
+    user_data = get_user_plot_data(db=db, username=username)
+    try:
+        settings = LevelThresholdSettings(
+            initial_factor_level=user_data.peak_level,
+            decay_constant=user_data.decay_constant,
+            weekly_infusions=user_data.weekly_infusions,
+            thresholds=thresholds,
+        )
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return get_threshold_crossings(settings)
+
+
+@user_router.get(
+    "/user-levels/{username}",
+    response_model=UserLevels,
+    responses={
+        400: {"description": "No measurements"},
+        404: {"description": "User not found"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+def get_user_levels_endpoint(
+    username: str,
+    current_time: str = Query(..., alias="currentTime", description="Current time, e.g. Monday 08:30 AM."),
+    max_points: int | None = Query(
+        None, ge=MIN_PLOT_POINTS, description="Downsample the curve to at most this many points, shape-preserving."
+    ),
+    db: Session = Depends(get_db),
+) -> UserLevels:
+    try:
+        return UserLevels(**get_user_levels(db, username, current_time, max_points))
+    except HTTPException:
+        raise
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not get the level curve of user {username}: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@user_router.get(
+    "/bands/{username}",
+    response_model=FactorLevelBands,
+    responses={
+        400: {"description": "Invalid percentiles or no measurements"},
+        404: {"description": "User not found"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+def get_user_level_bands(
+    username: str,
+    current_time: str = Query(..., alias="currentTime", description="Current time, e.g. Monday 08:30 AM."),
+    percentiles: List[float] = Query([5.0, 50.0, 95.0], description="Percentiles (0-100) of the bands."),
+    max_points: int | None = Query(
+        None, ge=MIN_PLOT_POINTS, description="Downsample the curves to at most this many points, shape-preserving."
+    ),
+    db: Session = Depends(get_db),
+) -> FactorLevelBands:
+    try:
+        return FactorLevelBands(**calculate_user_level_bands(db, username, current_time, percentiles, max_points))
+    except HTTPException:
+        raise
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not compute level bands for user {username}: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.post(
+    "/schedule-search",
+    response_model=ScheduleSearchResult,
+    responses={
+        400: {"description": "Invalid search settings"},
+        500: {"description": "Could not compute. Server error."},
+    },
+)
+def get_best_schedules(settings: ScheduleSearchSettings) -> ScheduleSearchResult:
+    try:
+        result = search_infusion_schedules(settings)
+        return ScheduleSearchResult(**result)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception:
+        logger.error(f"Could not search infusion schedules: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Could not compute. Server error.")
+
+
+@router.get("/cache-stats", response_model=LevelCacheStats)
+def get_cache_stats() -> LevelCacheStats:
+    return LevelCacheStats(**level_cache.stats())
+
+
+@router.get("/compute-stats", response_model=ComputePoolStats)
+def get_compute_stats() -> ComputePoolStats:
+    return ComputePoolStats(**compute_pool.stats())
+
+
+@router.get("/user-curve-stats", response_model=UserCurveStats)
+def get_user_curve_stats() -> UserCurveStats:
+    return UserCurveStats(**user_curve_store.stats())
+
+
+@user_router.get(
     "/default-values",
     response_model=DefaultValues,
 
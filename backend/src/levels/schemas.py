@@ -1,9 +1,14 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field, conlist
+from pydantic import BaseModel, Field, conlist, field_validator
 
+from .models import InfusionSchedule
+from .utils import parse_schedule
 
-class FactorLevelSettings(BaseModel):
+DEFAULT_THRESHOLDS = [1.0, 5.0, 15.0]
+
+
+class InfusionScheduleSettings(BaseModel):
     initial_factor_level: float = Field(
         ..., alias="peakLevel", gt=0, description="Initial peak level must be greater than 0."
     )
@@ -11,6 +16,22 @@ class FactorLevelSettings(BaseModel):
     weekly_infusions: conlist(item_type=str, min_length=1) = Field(
         ..., alias="weeklyInfusions", description="List of weekly infusion times in ISO 8601 format."
     )
+
+    @field_validator("weekly_infusions")
+    @classmethod
+    def weekly_infusions_must_parse(cls, weekly_infusions: List[str]) -> List[str]:
+        parse_schedule(tuple(weekly_infusions))
+        return weekly_infusions
+
+    @property
+    def schedule(self) -> InfusionSchedule:
+        return parse_schedule(tuple(self.weekly_infusions))
+
+    class Config:
+        populate_by_name = True
+
+
+class FactorLevelSettings(InfusionScheduleSettings):
     current_time: str = Field(..., alias="currentTime", description="Current time in ISO 8601 format.")
 
     class Config:
@@ -25,9 +46,31 @@ class FactorLevelSettings(BaseModel):
         }
 
 
+class FactorLevelProjectionSettings(FactorLevelSettings):
+    horizon: float = Field(
+        24.0 * 7, gt=0, le=24 * 7 * 5, description="Projection length in hours, starting at the beginning of the week."
+    )
+    step: float = Field(0.1, ge=1 / 60, le=24, description="Distance between two samples in hours.")
+
+    @field_validator("step")
+    @classmethod
+    def step_must_be_whole_minutes(cls, step: float) -> float:
+        if abs(step * 60 - round(step * 60)) > 1e-6:
+            raise ValueError("Step must be a whole number of minutes")
+        return step
+
+    @property
+    def step_minutes(self) -> int:
+        return round(self.step * 60)
+
+    class Config:
+        populate_by_name = True
+
 
 class FactorLevels(BaseModel):
-    hours: conlist(item_type=float, min_length=1) = Field(..., description="Hours of one week in 0.1 interval.")
+    hours: conlist(item_type=float, min_length=1) = Field(
+        ..., description="Hours of one week in 0.1 interval, or the kept hours when max_points is set."
+    )
     start_of_week: str = Field(
         ..., description="Timestamp of when the week starts (Monday night at 24:00) in ISO 8601 format."
     )
@@ -47,6 +90,195 @@ class FactorLevels(BaseModel):
 
 
 
+class ScenarioLevels(BaseModel):
+    levels: conlist(item_type=float, min_length=1) = Field(
+        ..., description="Factor levels in 0.1 interval for the whole week."
+    )
+    current_time: str = Field(..., description="Current time in ISO 8601 format.")
+
+    current_factor_level: conlist(item_type=float, min_length=2) = Field(
+        ..., description="Factor values (time, factor value) now."
+    )
+
+    halving_time: float = Field(..., description="Factor halving time.")
+
+
+class FactorLevelsBatch(BaseModel):
+    hours: conlist(item_type=float, min_length=1) = Field(..., description="Hours of one week in 0.1 interval.")
+    start_of_week: str = Field(
+        ..., description="Timestamp of when the week starts (Monday night at 24:00) in ISO 8601 format."
+    )
+    scenarios: conlist(item_type=ScenarioLevels, min_length=1) = Field(
+        ..., description="Factor levels for every requested scenario, in request order."
+    )
+
+
+class LevelBand(BaseModel):
+    percentile: float = Field(..., description="Percentile (0-100) of the simulated curves.")
+    levels: conlist(item_type=float, min_length=1) = Field(
+        ..., description="Factor levels in 0.1 interval for the whole week at this percentile."
+    )
+
+
+class FactorLevelBands(FactorLevels):
+    bands: List[LevelBand] = Field(
+        ..., description="Uncertainty bands from the spread of the user's measured decay constants around the fit."
+    )
+    draws: int = Field(..., description="Number of decay constants drawn for the bands.")
+
+
+class LevelsAtSettings(InfusionScheduleSettings):
+    timestamps: conlist(item_type=str, max_length=1000) = Field(
+        default_factory=list, description="ISO 8601 timestamps to evaluate. Defaults to now when empty."
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class LevelAt(BaseModel):
+    time: str = Field(..., description="Timestamp in ISO 8601 format.")
+    hour: float = Field(..., description="Hours since the start of that timestamp's week.")
+    level: float = Field(..., description="Factor level (%) at that instant.")
+
+
+class LevelsAt(BaseModel):
+    levels: List[LevelAt] = Field(..., description="Factor levels in request order.")
+    halving_time: float = Field(..., description="Factor halving time.")
+
+
+class LevelCacheStats(BaseModel):
+    hits: int = Field(..., description="Requests answered from the cache.")
+    misses: int = Field(..., description="Requests that had to compute the curve.")
+    evictions: int = Field(..., description="Entries dropped because the cache was full.")
+    expirations: int = Field(..., description="Entries dropped because of their age or a new week.")
+    size: int = Field(..., description="Entries currently cached.")
+    max_entries: int = Field(..., description="Maximum number of cached entries.")
+    ttl: float = Field(..., description="Maximum age of an entry in seconds.")
+
+
+class UserCurveStats(BaseModel):
+    evictions: int = Field(..., description="Curves dropped because the store was full.")
+    expirations: int = Field(..., description="Curves dropped because of their age.")
+    size: int = Field(..., description="Curves currently stored.")
+    pending: int = Field(..., description="Users whose curve is being recomputed in the background.")
+    max_entries: int = Field(..., description="Maximum number of stored curves.")
+    ttl: float = Field(..., description="Maximum age of a stored curve in seconds.")
+
+
+class ComputePoolStats(BaseModel):
+    workers: int = Field(..., description="Worker processes for large computations, 0 computes everything inline.")
+    max_pending: int = Field(..., description="Computations that may be running or queued before new ones are refused.")
+    inline_samples: int = Field(..., description="Computations with fewer samples run inline in the request.")
+    pending: int = Field(..., description="Computations currently running or queued.")
+    busy_workers: int = Field(..., description="Workers currently computing.")
+    submitted: int = Field(..., description="Computations sent to the workers.")
+    completed: int = Field(..., description="Computations the workers finished.")
+    rejected: int = Field(..., description="Computations refused because too many were pending.")
+    inline: int = Field(..., description="Computations small enough to run inline.")
+    utilization: float = Field(..., description="Share of the workers' time spent computing since the pool started.")
+
+
+class LevelThresholdSettings(InfusionScheduleSettings):
+    thresholds: conlist(item_type=float, min_length=1, max_length=10) = Field(
+        DEFAULT_THRESHOLDS, description="Factor levels (%) to report on."
+    )
+
+    @field_validator("thresholds")
+    @classmethod
+    def thresholds_must_be_positive(cls, thresholds: List[float]) -> List[float]:
+        if any(threshold <= 0 for threshold in thresholds):
+            raise ValueError("Thresholds must be greater than 0.")
+        return thresholds
+
+
+class LevelMetricsSettings(LevelThresholdSettings):
+    decay_constant: float = Field(..., alias="decayConstant", lt=0, description="Steady state needs a decaying level.")
+
+
+class ThresholdDuration(BaseModel):
+    threshold: float = Field(..., description="Factor level (%).")
+    hours: float = Field(..., description="Hours per week spent below the threshold.")
+
+
+class LevelMetrics(BaseModel):
+    trough: float = Field(..., description="Lowest steady state level, right before an infusion.")
+    peak: float = Field(..., description="Highest steady state level, right after an infusion.")
+    auc: float = Field(..., description="Area under the steady state curve over one week (% * h).")
+    average_level: float = Field(..., description="Time-averaged steady state level.")
+    time_below: List[ThresholdDuration] = Field(..., description="Weekly hours below each requested threshold.")
+
+
+class UserLevels(FactorLevels):
+    metrics: Optional[LevelMetrics] = Field(
+        None, description="Steady state metrics, missing when the level does not decay."
+    )
+
+
+class LevelCrossing(BaseModel):
+    hour: float = Field(..., description="Hours since the start of the week.")
+    time: str = Field(..., description="Crossing time in ISO 8601 format.")
+    direction: Literal["up", "down"] = Field(..., description="Whether the level rises above or falls below.")
+
+
+class ThresholdCrossings(BaseModel):
+    threshold: float = Field(..., description="Factor level (%).")
+    crossings: List[LevelCrossing] = Field(..., description="Crossings of this threshold in chronological order.")
+
+
+class LevelCrossings(BaseModel):
+    start_of_week: str = Field(
+        ..., description="Timestamp of when the week starts (Monday night at 24:00) in ISO 8601 format."
+    )
+    thresholds: List[ThresholdCrossings] = Field(..., description="Crossings per requested threshold.")
+
+
+class InfusionWindow(BaseModel):
+    weekday: Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"] = Field(
+        ..., description="Day of the window."
+    )
+    start: str = Field("12:00 AM", description="Earliest infusion time on that day, e.g. 07:00 AM.")
+    end: str = Field("11:30 PM", description="Latest infusion time on that day, e.g. 09:30 PM.")
+
+
+class ScheduleSearchSettings(BaseModel):
+    initial_factor_level: float = Field(
+        ..., alias="peakLevel", gt=0, description="Initial peak level must be greater than 0."
+    )
+    decay_constant: float = Field(..., alias="decayConstant", lt=0, description="Steady state needs a decaying level.")
+    infusions_per_week: int = Field(..., alias="infusionsPerWeek", ge=1, le=14, description="Infusions per week.")
+    windows: List[InfusionWindow] = Field(
+        default_factory=list, description="Allowed infusion windows. The whole week is allowed when empty."
+    )
+    resolution_minutes: int = Field(
+        30, alias="resolutionMinutes", ge=5, le=24 * 60, description="Spacing of candidate infusion times."
+    )
+    threshold: Optional[float] = Field(
+        None, gt=0, description="Rank by weekly hours below this level (%) instead of by steady state trough."
+    )
+    top: int = Field(5, ge=1, le=20, description="Number of ranked schedules to return.")
+    time_budget: float = Field(
+        2.0, alias="timeBudget", gt=0, le=30, description="Seconds after which the best schedules so far are returned."
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class ScheduleCandidate(BaseModel):
+    weekly_infusions: List[str] = Field(..., description="Infusion times of the schedule.")
+    trough: float = Field(..., description="Steady state trough level.")
+    peak: float = Field(..., description="Steady state peak level.")
+    hours_below: Optional[float] = Field(None, description="Weekly hours below the requested threshold.")
+
+
+class ScheduleSearchResult(BaseModel):
+    schedules: List[ScheduleCandidate] = Field(..., description="Best schedules found, best first.")
+    evaluated: int = Field(..., description="Number of schedules evaluated.")
+    total_candidates: int = Field(..., description="Number of schedules in the search space.")
+    complete: bool = Field(..., description="False when the time budget ran out before the whole space was searched.")
+
+
 class DefaultValues(BaseModel):
     decay_constant: Optional[float] = Field(
         None, title="Decay constant", description="Factor level decay constant", alias="decayConstant"
@@ -1,123 +1,502 @@
-from math import exp, isclose
-from typing import Dict, List
+import json
+import logging
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
 
 import numpy as np
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from .models import FactorCalculationParameters
-from .schemas import DefaultValues, FactorLevelSettings, DecayConstant, DecayConstantParameters
-from .utils import get_start_of_the_week, create_week_hours, convert_to_datetime, generate_refill_hours
-from ..common.utils import calculate_decay_constant, calculate_halving_time
-from ..database.crud import get_user_measurement, get_user_by_username
+from .cache import level_cache, level_cache_key, decay_draw_cache
+from .compute import compute_pool
+from .downsampling import downsample_indices
+from .engine import evaluate_levels, evaluate_levels_batch, iterate_levels, calculate_threshold_crossings, \
+    create_sample_minutes, minutes_to_hours, nearest_sample, evaluate_decay_draws, evaluate_levels_at, \
+    SAMPLE_MINUTES
+from .metrics import calculate_steady_state_metrics
+from .optimizer import optimize_schedule
+from .materialized import user_curve_store
+from .models import FactorCalculationParameters, WeekLevels, UserCurve, UserCurveInputs
+from .schemas import DefaultValues, FactorLevelSettings, DecayConstant, DecayConstantParameters, \
+    FactorLevelProjectionSettings, LevelMetricsSettings, LevelThresholdSettings, ScheduleSearchSettings, \
+    LevelsAtSettings, DEFAULT_THRESHOLDS
+from .utils import get_start_of_the_week, get_minute_of_week, convert_to_datetime, \
+    create_window_slots, format_refill_time, parse_timestamp, CET
+from ..common.utils import calculate_decay_constant, calculate_halving_time, mean_and_deviation
+from ..core.config import LEVEL_BAND_DRAWS
+from ..database.crud import list_user_measurements, get_user_by_username, get_decay_fit
 from ..database.dependencies import get_db
+from ..database.models import User, DecayFit, Measurement
 
+logger = logging.getLogger("hem_tracker")
+
+DEFAULT_USERNAME = "stefanjosan_altuvoct"
+
+
+def calculate_factor_levels(settings: FactorLevelSettings, max_points: int | None = None) -> Dict[str, str]:
+    return week_levels_to_dict(compute_week_levels(settings, max_points))
 
-def calculate_factor_levels(settings: FactorLevelSettings) -> Dict[str, str]:
-    try:
-        hours_in_a_week = 24 * 7
 
-        start_of_week = get_start_of_the_week()
+def week_levels_to_dict(week: WeekLevels) -> Dict[str, object]:
+    return {
+        "hours": week.hours,
+        "start_of_week": week.start_of_week.isoformat(),
+        "levels": week.levels.tolist(),
+        "current_time": week.current_time.isoformat(),
+        "current_factor_level": week.current_factor_level,
+        "halving_time": week.halving_time,
+    }
 
-        halving_time = calculate_halving_time(decay_constant=settings.decay_constant)
 
-        refill_hours = generate_refill_hours(settings.weekly_infusions, start_of_week)
+def compute_week_levels(settings: FactorLevelSettings, max_points: int | None = None) -> WeekLevels:
+    hours_in_a_week = 24 * 7
 
-        week_hours = create_week_hours(hours_in_a_week)
+    start_of_week = get_start_of_the_week()
 
+    week_minutes = create_sample_minutes(0, hours_in_a_week * 60 // SAMPLE_MINUTES)
+
+    cache_key = level_cache_key(
+        settings.initial_factor_level, settings.decay_constant, settings.schedule, start_of_week
+    )
+    levels = level_cache.get(cache_key, start_of_week)
+    if levels is None:
         level_params = FactorCalculationParameters(
-            refill_hours=refill_hours,
+            refill_minutes=settings.schedule.minutes_of_week(),
             initial_factor_level=settings.initial_factor_level,
             decay_constant=settings.decay_constant,
             week_duration=hours_in_a_week,
         )
 
-        levels = calculate_levels(week_hours=week_hours, params=level_params)
+        levels = compute_pool.run(len(week_minutes), evaluate_levels, week_minutes, level_params)
+        level_cache.put(cache_key, start_of_week, levels)
+
+    return assemble_week_levels(levels, start_of_week, settings.current_time, settings.decay_constant, max_points)
+
+
+def assemble_week_levels(
+    levels: np.ndarray, start_of_week: datetime, current_time: str, decay_constant: float, max_points: int | None
+) -> WeekLevels:
+    halving_time = calculate_halving_time(decay_constant=decay_constant)
+
+    week_hours = minutes_to_hours(create_sample_minutes(0, len(levels))).tolist()
+
+    current_time = convert_to_datetime(current_time)
+    current_sample = get_current_sample(current_time, start_of_week, len(levels))
+    current_hour = week_hours[current_sample]
+    current_factor_level = float(levels[current_sample])
+
+    week = WeekLevels(
+        hours=week_hours,
+        start_of_week=start_of_week,
+        levels=levels,
+        current_time=current_time,
+        current_factor_level=[current_hour, current_factor_level],
+        halving_time=halving_time,
+    )
+    if max_points is not None and max_points < len(week_hours):
+        week = downsample_week(week, downsample_indices(np.asarray(week_hours), levels, max_points))
+    return week
+
+
+def downsample_week(week: WeekLevels, indices: np.ndarray) -> WeekLevels:
+    hours = np.asarray(week.hours)[indices].tolist()
+    return replace(week, hours=hours, levels=week.levels[indices], downsampled=True)
+
+
+def calculate_factor_levels_batch(scenarios: List[FactorLevelSettings]) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    start_of_week = get_start_of_the_week()
 
+    week_minutes = create_sample_minutes(0, hours_in_a_week * 60 // SAMPLE_MINUTES)
+    week_hours = minutes_to_hours(week_minutes).tolist()
+
+    level_params = []
+    for settings in scenarios:
+        level_params.append(
+            FactorCalculationParameters(
+                refill_minutes=settings.schedule.minutes_of_week(),
+                initial_factor_level=settings.initial_factor_level,
+                decay_constant=settings.decay_constant,
+                week_duration=hours_in_a_week,
+            )
+        )
+
+    levels = compute_pool.run(len(level_params) * len(week_minutes), evaluate_levels_batch, week_minutes, level_params)
+
+    results = []
+    for settings, scenario_levels in zip(scenarios, levels.tolist()):
         current_time = convert_to_datetime(settings.current_time)
-        current_hour = (current_time - start_of_week).total_seconds() / 3600
-        current_hour = float(f"{current_hour:.1f}")
-        current_factor_level = levels[week_hours.index(current_hour)]
-
-        result = {
-            "hours": week_hours,
-            "start_of_week": start_of_week.isoformat(),
-            "levels": levels,
-            "current_time": current_time.isoformat(),
-            "current_factor_level": [current_hour, current_factor_level],
-            "halving_time": halving_time,
-        }
-        return result
-    except Exception as exc:
-        raise exc
-
-
-def calculate_levels(week_hours: List[float], params: FactorCalculationParameters) -> List[float]:
-    levels = []
-    peak_value = params.initial_factor_level
-
-    for hour in week_hours:
-        if not params.refill_hours:
-            levels.append(0.0)
-            continue
-
-        if hour < params.refill_hours[0]:
-            previous_week_last_refill = params.refill_hours[-1] - params.week_duration
-            factor_value = params.initial_factor_level * exp(params.decay_constant * (hour - previous_week_last_refill))
-            levels.append(factor_value)
-            continue
-
-        for i in range(len(params.refill_hours)):
-            if isclose(hour, params.refill_hours[i]):
-                if i == 0:
-                    previous_week_last_refill = params.refill_hours[-1] - params.week_duration
-                    previous_hour = hour - 0.1
-                    previous_level_value = peak_value * exp(
-                        params.decay_constant * (previous_hour - previous_week_last_refill)
-                    )
-                    level_value = params.initial_factor_level + previous_level_value
-                    peak_value = level_value
-                    levels.append(level_value)
-                else:
-                    previous_hour = hour - 0.1
-                    last_refill_hour = params.refill_hours[i - 1]
-                    previous_value = peak_value * exp(params.decay_constant * (previous_hour - last_refill_hour))
-                    level_value = params.initial_factor_level + previous_value
-                    peak_value = level_value
-                    levels.append(level_value)
-                break
-
-            if hour < params.refill_hours[i]:
-                if i == 0:
-                    previous_week_last_refill = params.refill_hours[-1] - params.week_duration
-                    level_value = params.initial_factor_level * exp(
-                        params.decay_constant * (hour - previous_week_last_refill)
-                    )
-                    levels.append(level_value)
-                else:
-                    level_value = peak_value * exp(params.decay_constant * (hour - params.refill_hours[i - 1]))
-                    levels.append(level_value)
-                break
-
-        if hour > params.refill_hours[-1]:
-            levels.append(peak_value * exp(params.decay_constant * (hour - params.refill_hours[-1])))
-
-    return levels
+        current_sample = get_current_sample(current_time, start_of_week, len(week_minutes))
+        results.append(
+            {
+                "levels": scenario_levels,
+                "current_time": current_time.isoformat(),
+                "current_factor_level": [week_hours[current_sample], scenario_levels[current_sample]],
+                "halving_time": calculate_halving_time(decay_constant=settings.decay_constant),
+            }
+        )
 
+    return {
+        "hours": week_hours,
+        "start_of_week": start_of_week.isoformat(),
+        "scenarios": results,
+    }
 
-def get_values_for_default_user(db: Session = Depends(get_db)) -> DefaultValues:
-    username = "stefanjosan_altuvoct"
-    measurement_id = 0
 
+def get_user_levels(db: Session, username: str, current_time: str, max_points: int | None = None) -> Dict[str, object]:
     user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+
+    inputs = get_user_curve_inputs(db, user)
+    return materialized_user_levels(user.id, inputs, current_time, max_points)
+
+
+def materialized_user_levels(
+    user_id: int, inputs: UserCurveInputs, current_time: str, max_points: int | None = None
+) -> Dict[str, object]:
+    curve = materialized_user_curve(user_id, inputs)
+    week = assemble_week_levels(curve.levels, get_start_of_the_week(), current_time, inputs.decay_constant, max_points)
+    return {**week_levels_to_dict(week), "metrics": curve.metrics}
+
+
+def materialized_user_curve(user_id: int, inputs: UserCurveInputs) -> UserCurve:
+    curve = user_curve_store.get(user_id, inputs)
+    if curve is None:
+        # Not materialized yet, or the inputs changed since: compute now and keep it for the next view.
+        curve = compute_user_curve(inputs)
+        user_curve_store.put(user_id, curve)
+    return curve
+
+
+def refresh_user_curve(db: Session, user: User) -> None:
+    submit_user_curve(user, get_decay_fit(db=db, user_id=user.id))
+
+
+def submit_user_curve(user: User, decay_fit: DecayFit | None) -> None:
+    try:
+        inputs = user_curve_inputs(user, decay_fit)
+    except ValueError as exc:
+        logger.debug(f"Level curve of user {user.username} not materialized: {exc}")
+        return
+    user_curve_store.submit(user.id, inputs, compute_user_curve)
+
+
+def discard_user_curve(user_id: int) -> None:
+    user_curve_store.discard(user_id)
+
+
+def get_user_curve_inputs(db: Session, user: User) -> UserCurveInputs:
+    return user_curve_inputs(user, get_decay_fit(db=db, user_id=user.id))
+
+
+def user_curve_inputs(user: User, decay_fit: DecayFit | None) -> UserCurveInputs:
+    if decay_fit is None:
+        raise ValueError("No measurement found")
+
+    decay_constant, _ = decay_fit.estimate()
+    return UserCurveInputs(
+        initial_factor_level=user.peak_level,
+        decay_constant=decay_constant,
+        refill_minutes=tuple(user.schedule.minutes_of_week()),
+    )
+
+
+def compute_user_curve(inputs: UserCurveInputs) -> UserCurve:
+    hours_in_a_week = 24 * 7
+
+    level_params = FactorCalculationParameters(
+        refill_minutes=list(inputs.refill_minutes),
+        initial_factor_level=inputs.initial_factor_level,
+        decay_constant=inputs.decay_constant,
+        week_duration=hours_in_a_week,
+    )
+    levels = evaluate_levels(create_sample_minutes(0, hours_in_a_week * 60 // SAMPLE_MINUTES), level_params)
+    levels.setflags(write=False)
+
+    metrics = None
+    if inputs.refill_minutes and inputs.decay_constant < 0:
+        metrics = summarize_steady_state(
+            list(inputs.refill_minutes), inputs.initial_factor_level, inputs.decay_constant, DEFAULT_THRESHOLDS
+        )
+    return UserCurve(inputs=inputs, levels=levels, metrics=metrics)
+
+
+def calculate_levels_at(settings: LevelsAtSettings) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    times = [parse_timestamp(timestamp) for timestamp in settings.timestamps] or [datetime.now(CET)]
+    # Every timestamp is placed in its own week, the same week curve /update-levels shows for that week.
+    hours = np.array([(time - get_start_of_the_week(time)).total_seconds() / 3600 for time in times])
+
+    level_params = FactorCalculationParameters(
+        refill_minutes=settings.schedule.minutes_of_week(),
+        initial_factor_level=settings.initial_factor_level,
+        decay_constant=settings.decay_constant,
+        week_duration=hours_in_a_week,
+    )
+    levels = evaluate_levels_at(hours, level_params)
+
+    return {
+        "levels": [
+            {"time": time.isoformat(), "hour": hour, "level": level}
+            for time, hour, level in zip(times, hours.tolist(), levels.tolist())
+        ],
+        "halving_time": calculate_halving_time(decay_constant=settings.decay_constant),
+    }
+
+
+def calculate_user_level_bands(
+    db: Session, username: str, current_time: str, percentiles: List[float], max_points: int | None = None
+) -> Dict[str, object]:
+    validate_percentiles(percentiles)
+
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+
+    return user_level_bands(user, get_decay_fit(db=db, user_id=user.id), current_time, percentiles, max_points)
+
+
+def validate_percentiles(percentiles: List[float]) -> None:
+    if any(not 0 <= percentile <= 100 for percentile in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100")
+
+
+def user_level_bands(
+    user: User, decay_fit: DecayFit | None, current_time: str, percentiles: List[float], max_points: int | None = None
+) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    inputs = user_curve_inputs(user, decay_fit)
+    if not inputs.refill_minutes:
+        raise ValueError(f"No infusion times for user {user.username}")
+    decay_constant, decay_constant_error = decay_fit.estimate()
+
+    # The bands show where a single measurement may fall, so they spread by the deviation of the measured decay
+    # constants and not only by the error of the fit, which shrinks as measurements accumulate.
+    _, decay_constant_deviation = mean_and_deviation(
+        decay_fit.measurement_count, decay_fit.sum_decay_constant, decay_fit.sum_decay_constant_sq
+    )
+    spread = float(np.hypot(decay_constant_deviation or 0.0, decay_constant_error or 0.0))
+
+    # Draws are kept until the user's fit changes, so the bands do not jitter between requests.
+    signature = (
+        decay_fit.measurement_count,
+        decay_fit.sum_tt,
+        decay_fit.sum_ty,
+        decay_fit.sum_yy,
+        decay_fit.sum_decay_constant,
+        decay_fit.sum_decay_constant_sq,
+    )
+    draws = decay_draw_cache.get(user.id, signature)
+    if draws is None:
+        draws = draw_decay_constants(decay_constant, spread, LEVEL_BAND_DRAWS)
+        decay_draw_cache.put(user.id, signature, draws)
+
+    level_params = FactorCalculationParameters(
+        refill_minutes=list(inputs.refill_minutes),
+        initial_factor_level=inputs.initial_factor_level,
+        decay_constant=inputs.decay_constant,
+        week_duration=hours_in_a_week,
+    )
+    week_minutes = create_sample_minutes(0, hours_in_a_week * 60 // SAMPLE_MINUTES)
+    bands = compute_pool.run(
+        len(draws) * len(week_minutes), evaluate_level_bands, week_minutes, level_params, draws, percentiles
+    )
+
+    # The central curve is the user's materialized week, so it matches GET /api/levels/user-levels/{username}.
+    curve = materialized_user_curve(user.id, inputs)
+    week = assemble_week_levels(curve.levels, get_start_of_the_week(), current_time, decay_constant, None)
+    if max_points is not None and max_points < len(week.hours):
+        # The bands are cut at the samples chosen for the central curve, so all series share the same hours.
+        indices = downsample_indices(np.asarray(week.hours), week.levels, max_points)
+        week, bands = downsample_week(week, indices), bands[:, indices]
+
+    return {
+        **week_levels_to_dict(week),
+        "bands": [
+            {"percentile": percentile, "levels": levels}
+            for percentile, levels in zip(percentiles, bands.tolist())
+        ],
+        "draws": len(draws),
+    }
+
+
+def draw_decay_constants(decay_constant: float, spread: float, draws: int) -> np.ndarray:
+    samples = np.random.default_rng().normal(decay_constant, spread, draws)
+    # A draw from the tail must not turn the decay into growth.
+    return np.sort(np.minimum(samples, 0.0))
+
+
+def evaluate_level_bands(
+    minutes: np.ndarray, params: FactorCalculationParameters, draws: np.ndarray, percentiles: List[float]
+) -> np.ndarray:
+    # Reduced to the percentiles where the curves are evaluated, so only the bands cross a process boundary.
+    return curve_percentiles(evaluate_decay_draws(minutes, params, draws), percentiles)
+
+
+def curve_percentiles(curves: np.ndarray, percentiles: List[float]) -> np.ndarray:
+    # The level only grows with the decay constant, so curves evaluated for sorted draws are already sorted in
+    # every sample and a percentile is the interpolation between two neighbouring curves, without a partition.
+    positions = np.asarray(percentiles, dtype=float) / 100 * (len(curves) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(curves) - 1)
+    fraction = (positions - lower)[:, None]
+    return curves[lower] + fraction * (curves[upper] - curves[lower])
+
+
+def stream_factor_levels(settings: FactorLevelProjectionSettings) -> Iterator[str]:
+    hours_in_a_week = 24 * 7
+
+    start_of_week = get_start_of_the_week()
+
+    level_params = FactorCalculationParameters(
+        refill_minutes=settings.schedule.minutes_of_week(),
+        initial_factor_level=settings.initial_factor_level,
+        decay_constant=settings.decay_constant,
+        week_duration=hours_in_a_week,
+    )
+
+    current_time = convert_to_datetime(settings.current_time)
+    current_minutes = np.array([nearest_sample(get_minute_of_week(current_time, start_of_week)) * SAMPLE_MINUTES])
+    current_factor_level = evaluate_levels(current_minutes, level_params)[0]
+
+    header = {
+        "start_of_week": start_of_week.isoformat(),
+        "current_time": current_time.isoformat(),
+        "current_factor_level": [float(minutes_to_hours(current_minutes)[0]), float(current_factor_level)],
+        "halving_time": calculate_halving_time(decay_constant=settings.decay_constant),
+        "horizon": settings.horizon,
+        "step": settings.step,
+    }
+    # Everything that can fail on bad input runs above, before the first byte is sent.
+    return generate_level_lines(header, level_params, settings.horizon, settings.step_minutes)
+
+
+def generate_level_lines(
+    header: Dict[str, object], level_params: FactorCalculationParameters, horizon: float, step_minutes: int
+) -> Iterator[str]:
+    yield json.dumps(header) + "\n"
+    for hours, levels in iterate_levels(level_params, horizon=horizon, step_minutes=step_minutes):
+        yield json.dumps({"hours": hours.tolist(), "levels": levels.tolist()}) + "\n"
+
+
+def calculate_level_metrics(settings: LevelMetricsSettings) -> Dict[str, object]:
+    return summarize_steady_state(
+        settings.schedule.minutes_of_week(), settings.initial_factor_level, settings.decay_constant, settings.thresholds
+    )
+
+
+def summarize_steady_state(
+    refill_minutes: List[int], dose: float, decay_constant: float, thresholds: List[float]
+) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    metrics = calculate_steady_state_metrics(
+        refill_hours=minutes_to_hours(refill_minutes),
+        dose=dose,
+        decay_constant=decay_constant,
+        week_duration=hours_in_a_week,
+        thresholds=np.asarray(thresholds, dtype=float),
+    )
+
+    return {
+        "trough": float(metrics["trough"]),
+        "peak": float(metrics["peak"]),
+        "auc": float(metrics["auc"]),
+        "average_level": float(metrics["average_level"]),
+        "time_below": [
+            {"threshold": threshold, "hours": hours}
+            for threshold, hours in zip(thresholds, metrics["time_below"].tolist())
+        ],
+    }
+
+
+def find_threshold_crossings(settings: LevelThresholdSettings) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    start_of_week = get_start_of_the_week()
+
+    level_params = FactorCalculationParameters(
+        refill_minutes=settings.schedule.minutes_of_week(),
+        initial_factor_level=settings.initial_factor_level,
+        decay_constant=settings.decay_constant,
+        week_duration=hours_in_a_week,
+    )
+
+    indices, hours, rising = calculate_threshold_crossings(level_params, np.asarray(settings.thresholds, dtype=float))
+
+    thresholds = [{"threshold": threshold, "crossings": []} for threshold in settings.thresholds]
+    for index, hour, is_rising in zip(indices.tolist(), hours.tolist(), rising.tolist()):
+        thresholds[index]["crossings"].append(
+            {
+                "hour": hour,
+                "time": (start_of_week + timedelta(hours=hour)).isoformat(),
+                "direction": "up" if is_rising else "down",
+            }
+        )
+
+    return {"start_of_week": start_of_week.isoformat(), "thresholds": thresholds}
+
+
+def search_infusion_schedules(settings: ScheduleSearchSettings) -> Dict[str, object]:
+    hours_in_a_week = 24 * 7
+
+    slots = create_window_slots(settings.windows, settings.resolution_minutes, hours_in_a_week)
+    if len(slots) < settings.infusions_per_week:
+        raise ValueError("Not enough candidate times in the allowed windows")
+
+    ranked, evaluated, total, complete = optimize_schedule(
+        slots=slots,
+        infusions=settings.infusions_per_week,
+        dose=settings.initial_factor_level,
+        decay_constant=settings.decay_constant,
+        week_duration=hours_in_a_week,
+        threshold=settings.threshold,
+        top=settings.top,
+        time_budget=settings.time_budget,
+    )
+
+    return {
+        "schedules": [
+            {
+                "weekly_infusions": [format_refill_time(minute) for minute in candidate["refill_minutes"]],
+                "trough": candidate["trough"],
+                "peak": candidate["peak"],
+                "hours_below": candidate["hours_below"] if settings.threshold is not None else None,
+            }
+            for candidate in ranked
+        ],
+        "evaluated": evaluated,
+        "total_candidates": total,
+        "complete": complete,
+    }
+
+
+def get_current_sample(current_time: datetime, start_of_week: datetime, samples: int) -> int:
+    current_sample = int(nearest_sample(get_minute_of_week(current_time, start_of_week)))
+    # The last minutes of Sunday round up to the first sample of the next week, keep them on this week's curve.
+    return min(max(current_sample, 0), samples - 1)
+
+
+def get_values_for_default_user(db: Session = Depends(get_db)) -> DefaultValues:
+    user = get_user_by_username(db, DEFAULT_USERNAME)
     if not user:
         raise ValueError(f"Default user not found")
 
-    measurement = get_user_measurement(db=db, user_id=user.id, measurement_id=measurement_id)
+    # The defaults come from the default user's first measurement.
+    measurements = list_user_measurements(db=db, user_id=user.id, limit=1)
+    return default_values_from_measurement(user, next(iter(measurements), None))
+
+
+def default_values_from_measurement(user: User, measurement: Measurement | None) -> DefaultValues:
     if not measurement:
         raise ValueError("No measurement found")
 
-    weekly_infusions = get_refill_times(db, username)
+    weekly_infusions = user.weekly_infusions
     if not weekly_infusions:
         raise ValueError("Weekly infusions not found")
 
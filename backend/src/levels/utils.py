@@ -1,83 +1,90 @@
-from datetime import datetime, timedelta
-from typing import List
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from typing import Tuple
 
 import numpy as np
 import pytz
 
+from .models import InfusionSchedule, InfusionTime
+
 CET = pytz.timezone("Europe/Berlin")
 
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 
-def convert_to_datetime(date_str):
-    now = datetime.now(CET)
-    current_year = now.year
-    current_month = now.month
-    time_part = " ".join(date_str.split()[1:])  # Gets "10:05 AM"
-    datetime_obj = datetime.strptime(time_part, "%I:%M %p")
-    datetime_obj = datetime_obj.replace(year=current_year, month=current_month)
+INFUSION_TIME_PATTERN = re.compile(
+    r"^\s*(?P<weekday>[A-Za-z]+)\s+(?P<hour>\d{1,2}):(?P<minute>\d{1,2})\s*(?P<period>[AaPp][Mm])\s*$"
+)
 
-    weekday_str = date_str.split()[0]  # Gets "Monday"
-    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    target_weekday = weekdays.index(weekday_str)
-    current_weekday = now.weekday()
 
-    days_difference = target_weekday - current_weekday
-    correct_date = now + timedelta(days=days_difference)
+@lru_cache(maxsize=1024)
+def parse_infusion_time(time_str: str) -> InfusionTime:
+    match = INFUSION_TIME_PATTERN.match(time_str)
+    if not match or match["weekday"] not in WEEKDAYS:
+        raise ValueError(f"Invalid infusion time: {time_str!r}, expected e.g. 'Monday 08:30 AM'")
 
-    final_datetime = datetime_obj.replace(day=correct_date.day)
+    hour, minute = int(match["hour"]), int(match["minute"])
+    if not 1 <= hour <= 12 or minute > 59:
+        raise ValueError(f"Invalid infusion time: {time_str!r}, expected e.g. 'Monday 08:30 AM'")
 
-    return CET.localize(final_datetime)
+    hour = hour % 12 + (12 if match["period"].upper() == "PM" else 0)
+    weekday = WEEKDAYS.index(match["weekday"])
+    return InfusionTime(weekday=weekday, minute_of_week=(weekday * 24 + hour) * 60 + minute)
 
 
-def generate_refill_hours(refill_times: List[str], start_of_week: datetime) -> List[float]:
-    refill_times_in_datetime_format = generate_refill_times_in_datetime_format(refill_times, start_of_week)
-    refill_hours = generate_refill_times_in_hour_format(refill_times_in_datetime_format, start_of_week)
-    return refill_hours
+@lru_cache(maxsize=1024)
+def parse_schedule(infusions: Tuple[str, ...]) -> InfusionSchedule:
+    return InfusionSchedule(infusions=tuple(parse_infusion_time(infusion) for infusion in infusions))
 
 
-def generate_refill_times_in_datetime_format(refill_times, start_of_week):
-    refill_datetimes = []
+def convert_to_datetime(date_str: str, now: datetime | None = None) -> datetime:
+    now = now or datetime.now(CET)
+    infusion_time = parse_infusion_time(date_str)
+    minute_of_day = infusion_time.minute_of_week - infusion_time.weekday * 24 * 60
+    target_date = now.date() + timedelta(days=infusion_time.weekday - now.weekday())
+    return CET.localize(datetime.combine(target_date, time(minute_of_day // 60, minute_of_day % 60)))
 
-    for time_str in refill_times:
-        refill_time_in_datetime = parse_refill_time(time_str, start_of_week)
-        refill_datetimes.append(refill_time_in_datetime)
 
-    return refill_datetimes
+def parse_timestamp(timestamp: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {timestamp!r}, expected ISO 8601, e.g. '2024-10-05T14:48:00+02:00'")
+    return CET.localize(parsed) if parsed.tzinfo is None else parsed.astimezone(CET)
 
 
-def parse_refill_time(time_str: str, start_of_week: datetime) -> datetime:
-    now = datetime.now(CET)
-    current_year = now.year
-    current_month = now.month
-    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    day_part, *time_part = time_str.split()
-    day_of_week = weekdays.index(day_part)
-    time_part = " ".join(time_part)
-    time_obj = datetime.strptime(time_part, "%I:%M %p")
-    time_obj = time_obj.replace(year=current_year, month=current_month)
-    day_datetime = start_of_week + timedelta(days=day_of_week)
-    return day_datetime.replace(hour=time_obj.hour, minute=time_obj.minute)
+def get_start_of_the_week(now: datetime | None = None) -> datetime:
+    today = (now or datetime.now(CET)).date()
+    start_of_week = CET.localize(datetime.combine(today - timedelta(days=today.weekday()), datetime.min.time()))
+    return start_of_week
 
 
-def generate_refill_times_in_hour_format(refill_times_in_datetime_format, start_of_week):
-    refill_hours_in_numbers = []
-    for refill_time_in_datetime in refill_times_in_datetime_format:
-        refill_time_in_hour = float(
-            f"{(refill_time_in_datetime - start_of_week).total_seconds() / 3600:.1f}"
-        )  # one decimal float
-        refill_hours_in_numbers.append(refill_time_in_hour)
-    return refill_hours_in_numbers
+def get_minute_of_week(current_time: datetime, start_of_week: datetime) -> int:
+    return int((current_time - start_of_week).total_seconds()) // 60
 
 
-def get_start_of_the_week():
-    start_of_week = CET.localize(
-        datetime.combine(
-            datetime.now(CET).date() - timedelta(days=datetime.now(CET).date().weekday()), datetime.min.time()
-        )
-    )
-    return start_of_week
+def format_refill_time(minute_of_week: int) -> str:
+    day, minute_of_day = divmod(minute_of_week, 24 * 60)
+    time_part = datetime.min.replace(hour=minute_of_day // 60, minute=minute_of_day % 60).strftime("%I:%M %p")
+    return f"{WEEKDAYS[day % 7]} {time_part}"
+
+
+def parse_time_of_day(time_str: str) -> int:
+    time_obj = datetime.strptime(time_str, "%I:%M %p")
+    return time_obj.hour * 60 + time_obj.minute
+
 
+def create_window_slots(windows, resolution_minutes: int, hours_in_a_week: int) -> np.ndarray:
+    if not windows:
+        return np.arange(0, hours_in_a_week * 60, resolution_minutes)
 
-def create_week_hours(hours_in_a_week):
-    week_hours = np.arange(0, hours_in_a_week, 0.1).round(2)
-    week_hours = week_hours.tolist()
-    return week_hours
+    slots = []
+    for window in windows:
+        day_start = WEEKDAYS.index(window.weekday) * 24 * 60
+        start = day_start + parse_time_of_day(window.start)
+        end = day_start + parse_time_of_day(window.end)
+        if end < start:
+            raise ValueError(f"Window on {window.weekday} ends before it starts")
+        slots.append(np.arange(start, end + 1, resolution_minutes))
+    return np.unique(np.concatenate(slots))
@@ -1,14 +1,26 @@
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.src.levels.router import router as levels
+from backend.src.levels.compute import compute_pool
+from backend.src.levels.encoding import BINARY_HEADERS
+from backend.src.levels.optimizer import shutdown_search_pool
+from backend.src.core.config import DATABASE_ASYNC, DB_POOL_WARM_UP
+from backend.src.database.database import engine, async_engine, pool_monitor, async_pool_monitor
+from backend.src.database.cache import user_cache
+from backend.src.database.pool import warm_up_pool, warm_up_async_pool
+from backend.src.levels.router import router as levels, user_router as user_levels
+from backend.src.levels.async_router import router as async_user_levels
 from backend.src.users.router import router as users
-from backend.src.measurement.router import router as measurement
+from backend.src.users.async_router import router as async_users
+from backend.src.measurement.router import router as measurement, NEXT_PAGE_HEADER
+from backend.src.measurement.async_router import router as async_measurement
 from backend.src.authentication.router import router as authentication
+from backend.src.authentication.async_router import router as async_authentication
 from backend.src.password_reset.router import router as password
 from backend.src.frontend.router import router as frontend
 from backend.src.common.logging_config import setup_logging
@@ -24,14 +36,40 @@ TEMPLATES_PATH = Path(__file__).parent / "templates"
 logger.debug(f"Static path: {STATIC_PATH.exists()}")
 logger.debug(f"Templates path: {TEMPLATES_PATH.exists()}")
 
-app = FastAPI(title="Hemophilia Tracker", version="0.0.1")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Worker processes and database connections are opened before the first request instead of by it.
+    compute_pool.start()
+    if DATABASE_ASYNC:
+        await warm_up_async_pool(async_engine, DB_POOL_WARM_UP)
+    else:
+        warm_up_pool(engine, DB_POOL_WARM_UP)
+    yield
+    compute_pool.shutdown()
+    shutdown_search_pool()
+    if DATABASE_ASYNC:
+        await async_engine.dispose()
+    engine.dispose()
+
+
+app = FastAPI(title="Hemophilia Tracker", version="0.0.1", lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory=str(STATIC_PATH)), name="static")
 
 app.include_router(levels)
-app.include_router(users)
-app.include_router(measurement)
-app.include_router(authentication)
+# The async routers serve the same paths on an async session, so requests wait on the connection pool only
+# instead of also holding a threadpool slot each.
+if DATABASE_ASYNC:
+    app.include_router(async_user_levels)
+    app.include_router(async_users)
+    app.include_router(async_measurement)
+    app.include_router(async_authentication)
+else:
+    app.include_router(user_levels)
+    app.include_router(users)
+    app.include_router(measurement)
+    app.include_router(authentication)
 app.include_router(password)
 app.include_router(frontend)
 
@@ -41,6 +79,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=BINARY_HEADERS + [NEXT_PAGE_HEADER],
 )
 
 
@@ -50,4 +89,17 @@ def check_static():
         "static_dir": str(STATIC_PATH),
         "exists": STATIC_PATH.exists(),
         "contents": [str(f) for f in STATIC_PATH.glob("**/*") if f.is_file()]
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/debug/db-pool")
+def check_db_pool():
+    pools = {"sync": pool_monitor.stats()}
+    if async_pool_monitor is not None:
+        pools["async"] = async_pool_monitor.stats()
+    return pools
+
+
+@app.get("/debug/user-cache")
+def check_user_cache():
+    return user_cache.stats()
@@ -0,0 +1,134 @@
+import logging
+
+import traceback
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+from .bulk import parse_import_rows, prepare_import
+from .export import async_stream_measurements
+from .router import MEASUREMENT_PAGE_SIZE, MAX_MEASUREMENT_PAGE_SIZE, NEXT_PAGE_HEADER, IMPORT_REQUEST_BODY, \
+    set_next_page, export_response, EXPORT_RESPONSES
+from .schemas import MeasurementCreate, MeasurementRequest, UserMeasurements, MeasurementDelete, MeasurementOrder, \
+    MeasurementImportResult, ExportFormat
+from .service import measurement_for_user
+from ..database import async_crud
+from ..database.dependencies import get_async_db
+from ..levels.service import submit_user_curve
+from backend.src.common.logging_config import setup_logging
+
+setup_logging()
+
+logger = logging.getLogger("hem_tracker")
+
+router = APIRouter(
+    prefix="/api/measurement",
+    tags=["measurement"],
+    responses={
+        404: {"description": "Measurement not found"},
+        500: {"description": "Internal server error"}
+    },
+)
+
+
+@router.get("/{username}/measurements/", response_model=list[UserMeasurements])
+async def user_measurements(
+    username: str,
+    response: Response,
+    after_id: int | None = Query(None, description=f"Id from the {NEXT_PAGE_HEADER} header of the previous page."),
+    limit: int = Query(MEASUREMENT_PAGE_SIZE, ge=1, le=MAX_MEASUREMENT_PAGE_SIZE, description="Measurements per page."),
+    order: MeasurementOrder = Query("asc", description="Oldest (asc) or newest (desc) measurements first."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    logger.debug(f"Attempt to read user measurement for user: {username}")
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+    measurements = await async_crud.list_user_measurements(
+        db=db, user_id=user.id, after_id=after_id, limit=limit, order=order
+    )
+    measurements = [UserMeasurements.model_validate(measurement, from_attributes=True) for measurement in measurements]
+    set_next_page(response, measurements, limit)
+    return measurements
+
+
+@router.get(
+    "/{username}/measurements/export",
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES,
+)
+async def export_measurements(
+    username: str,
+    export_format: ExportFormat = Query("csv", alias="format", description="CSV or newline-delimited JSON."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+    return export_response(async_stream_measurements(db, user.id, export_format), username, export_format)
+
+
+@router.post("/{username}/measurements/", response_model=MeasurementCreate)
+async def create_measurement(username: str, measurement: MeasurementRequest, db: AsyncSession = Depends(get_async_db)):
+    logger.debug(f"Attempt to create measurement for user: {username}")
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+
+    new_measurement = measurement_for_user(user, measurement)
+    if await async_crud.save_measurement(db=db, measurement=new_measurement) is not None:
+        submit_user_curve(user, await async_crud.get_decay_fit(db, user.id))
+    return new_measurement
+
+
+@router.post(
+    "/{username}/measurements/import",
+    response_model=MeasurementImportResult,
+    openapi_extra=IMPORT_REQUEST_BODY,
+    responses={
+        400: {"description": "Unreadable upload"},
+        413: {"description": "Too many measurements"},
+        415: {"description": "Neither CSV nor JSON"},
+    },
+)
+async def import_measurements(
+    username: str,
+    request: Request,
+    skip_invalid: bool = Query(False, description="Import the valid measurements even if some are invalid."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+
+    body = await request.body()
+    rows = await run_in_threadpool(parse_import_rows, request.headers.get("content-type", ""), body)
+    prepared = await run_in_threadpool(prepare_import, user.id, rows)
+    if prepared.errors and not skip_invalid:
+        return MeasurementImportResult(imported=0, errors=prepared.errors)
+    if prepared.measurements:
+        try:
+            await async_crud.save_measurements(db, user.id, prepared)
+        except Exception:
+            logger.error(f"Could not import measurements for user {username}: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail="Could not save the measurements")
+        submit_user_curve(user, await async_crud.get_decay_fit(db, user.id))
+    logger.info(f"Imported {len(prepared.measurements)} measurements for user {username}")
+    return MeasurementImportResult(imported=len(prepared.measurements), errors=prepared.errors)
+
+
+@router.delete("/{username}/measurements/{measurement_id}", response_model=MeasurementDelete)
+async def delete(username: str, measurement_id: int, db: AsyncSession = Depends(get_async_db)):
+    measurement = await async_crud.get_measurement(db=db, measurement_id=measurement_id)
+    return await async_crud.delete_measurement(db=db, db_measurement=measurement)
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from backend.src.measurement.schemas import MeasurementImportError
+
+IMPORT_FIELDS = ("peak_level", "time_elapsed", "second_level_measurement")
+IMPORT_MEDIA_TYPES = ("text/csv", "application/json")
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ROWS = 50_000
+MAX_COMMENT_LENGTH = 100
+
+
+class PreparedImport(NamedTuple):
+    measurements: List[Dict[str, object]]
+    increments: Dict[str, float]
+    errors: List[MeasurementImportError]
+
+
+def parse_import_rows(content_type: str, body: bytes) -> List[object]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type not in IMPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=415, detail=f"Upload measurements as one of {', '.join(IMPORT_MEDIA_TYPES)}")
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The upload is not UTF-8 encoded")
+
+    if media_type == "text/csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of measurements")
+
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} measurements per upload")
+    return rows
+
+
+def prepare_import(user_id: int, rows: List[object]) -> PreparedImport:
+    # Only reading the fields is done row by row, the decay constants and halving times of the whole upload are
+    # computed at once.
+    errors: Dict[int, str] = {}
+    values = np.full((len(rows), len(IMPORT_FIELDS)), np.nan)
+    comments: List[str | None] = [None] * len(rows)
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = f"Expected a measurement with the fields {', '.join(IMPORT_FIELDS)}"
+            continue
+        for column, field in enumerate(IMPORT_FIELDS):
+            try:
+                values[index, column] = float(row.get(field))
+            except (TypeError, ValueError):
+                errors.setdefault(index, f"{field} is missing or not a number")
+        comment = row.get("comment")
+        if comment:
+            comments[index] = str(comment)
+            if len(comments[index]) > MAX_COMMENT_LENGTH:
+                errors.setdefault(index, f"comment is longer than {MAX_COMMENT_LENGTH} characters")
+
+    peak_levels, time_elapsed, measured_levels = values.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratios = np.log(measured_levels) - np.log(peak_levels)
+        decay_constants = log_ratios / time_elapsed
+        halving_times = np.abs(np.log(2) / decay_constants)
+    # Rounded like calculate_halving_time, np.round differs from it on some values that end in a 5.
+    halving_times = np.array([float(f"{halving_time:.1f}") for halving_time in halving_times.tolist()])
+
+    for index in np.flatnonzero(~(np.isfinite(values) & (values > 0)).all(axis=1)):
+        errors.setdefault(int(index), "Levels and time elapsed must be positive numbers")
+    for index in np.flatnonzero(~np.isfinite(halving_times)):
+        errors.setdefault(int(index), "The measured level must differ from the peak level")
+
+    valid = np.ones(len(rows), dtype=bool)
+    valid[list(errors)] = False
+    measurements = [
+        {
+            "user_id": user_id,
+            "peak_level": peak_level,
+            "time_elapsed": elapsed,
+            "second_level_measurement": measured_level,
+            "decay_constant": decay_constant,
+            "halving_time": halving_time,
+            "comment": comments[index],
+        }
+        for index, peak_level, elapsed, measured_level, decay_constant, halving_time in zip(
+            np.flatnonzero(valid).tolist(),
+            peak_levels[valid].tolist(),
+            time_elapsed[valid].tolist(),
+            measured_levels[valid].tolist(),
+            decay_constants[valid].tolist(),
+            halving_times[valid].tolist(),
+        )
+    ]
+    increments = {
+        "measurement_count": len(measurements),
+        "sum_tt": float(np.sum(time_elapsed[valid] ** 2)),
+        "sum_ty": float(np.sum(time_elapsed[valid] * log_ratios[valid])),
+        "sum_yy": float(np.sum(log_ratios[valid] ** 2)),
+        "sum_decay_constant": float(np.sum(decay_constants[valid])),
+        "sum_decay_constant_sq": float(np.sum(decay_constants[valid] ** 2)),
+        "sum_halving_time": float(np.sum(halving_times[valid])),
+        "sum_halving_time_sq": float(np.sum(halving_times[valid] ** 2)),
+    }
+    report = [MeasurementImportError(row=index + 1, error=error) for index, error in sorted(errors.items())]
+    return PreparedImport(measurements, increments, report)
+
+
+def import_chunks(measurements: List[Dict[str, object]]) -> List[List[Dict[str, object]]]:
+    return [measurements[start:start + IMPORT_CHUNK_SIZE] for start in range(0, len(measurements), IMPORT_CHUNK_SIZE)]
@@ -4,10 +4,13 @@ from typing import Type
 
 import sqlalchemy
 from fastapi import HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from backend.src.common.logging_config import setup_logging
+from backend.src.database.crud import update_decay_fit, increment_decay_fit, latest_measurement_id
 from backend.src.database.models import Measurement
+from backend.src.measurement.bulk import PreparedImport, import_chunks
 from backend.src.measurement.schemas import MeasurementCreate, MeasurementDelete
 
 setup_logging()
@@ -27,6 +30,7 @@ def save_measurement(db: Session, measurement: MeasurementCreate) -> Measurement
             comment=measurement.comment
         )
         db.add(db_measurement)
+        update_decay_fit(db, db_measurement)
         db.commit()
         db.refresh(db_measurement)
         return db_measurement
@@ -45,15 +49,27 @@ def save_measurement(db: Session, measurement: MeasurementCreate) -> Measurement
         logger.debug(f"Traceback: {traceback.format_exc()}")
 
 
-def delete(db: Session, db_measurement: Type[Measurement] | list[Type[Measurement]]) -> MeasurementDelete:
+def save_measurements(db: Session, user_id: int, prepared: PreparedImport) -> None:
+    # One transaction and one executemany per chunk instead of a commit and refresh per measurement.
     try:
-        db.delete(db_measurement)
+        for chunk in import_chunks(prepared.measurements):
+            db.execute(insert(Measurement), chunk)
+        increment_decay_fit(db, user_id, latest_measurement_id(user_id), **prepared.increments)
         db.commit()
-        db.refresh(db_measurement)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def delete(db: Session, db_measurement: Type[Measurement] | list[Type[Measurement]]) -> MeasurementDelete:
+    try:
         measurement = MeasurementDelete(
             id=db_measurement.id,
             user_id=db_measurement.user_id
         )
+        db.delete(db_measurement)
+        update_decay_fit(db, db_measurement, sign=-1)
+        db.commit()
         return measurement
     except sqlalchemy.exc.IntegrityError as e:
         db.rollback()
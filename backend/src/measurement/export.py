@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Iterator, Sequence
+
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.src.database.crud import user_measurements_query
+from backend.src.database.models import Measurement
+from backend.src.measurement.schemas import ExportFormat
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = (
+    Measurement.id,
+    Measurement.peak_level,
+    Measurement.time_elapsed,
+    Measurement.second_level_measurement,
+    Measurement.decay_constant,
+    Measurement.halving_time,
+    Measurement.comment,
+)
+EXPORT_MEDIA_TYPES: Dict[str, str] = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_query(user_id: int) -> Select:
+    # Plain rows rather than ORM instances, and fetched through a server-side cursor EXPORT_CHUNK_SIZE rows at a
+    # time, so memory does not grow with the number of measurements.
+    return (
+        user_measurements_query(user_id, None, None, "asc")
+        .with_only_columns(*EXPORT_COLUMNS)
+        .execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+
+def export_header(export_format: ExportFormat) -> str:
+    if export_format == "ndjson":
+        return ""
+    return format_rows([[column.key for column in EXPORT_COLUMNS]], export_format)
+
+
+def format_rows(rows: Sequence[Row] | Sequence[Sequence[object]], export_format: ExportFormat) -> str:
+    if export_format == "ndjson":
+        return "".join(json.dumps(row._asdict()) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_measurements(db: Session, user_id: int, export_format: ExportFormat) -> Iterator[str]:
+    # The response is streamed after the request's session was closed, the export checks out its own connection
+    # with it and closes it again when the last chunk is sent or the client goes away.
+    try:
+        yield export_header(export_format)
+        for rows in db.execute(export_query(user_id)).partitions():
+            yield format_rows(rows, export_format)
+    finally:
+        db.close()
+
+
+async def async_stream_measurements(db: AsyncSession, user_id: int, export_format: ExportFormat) -> AsyncIterator[str]:
+    try:
+        yield export_header(export_format)
+        async for rows in (await db.stream(export_query(user_id))).partitions():
+            yield format_rows(rows, export_format)
+    finally:
+        await db.close()
@@ -1,11 +1,16 @@
 import logging
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from starlette.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse, StreamingResponse
 
-from .schemas import MeasurementCreate, MeasurementRequest, UserMeasurements, MeasurementDelete
-from .service import create_user_measurement, delete_measurement
+from .bulk import parse_import_rows, IMPORT_FIELDS
+from .export import stream_measurements, EXPORT_MEDIA_TYPES
+from .schemas import MeasurementCreate, MeasurementRequest, UserMeasurements, MeasurementDelete, MeasurementOrder, \
+    MeasurementImportResult, ExportFormat
+from .service import create_user_measurement, delete_measurement, import_user_measurements
+from ..database.crud import get_user_by_username
 from ..database.dependencies import get_db
 from ..users.service import get_user_measurements
 from backend.src.common.logging_config import setup_logging
@@ -14,6 +19,28 @@ setup_logging()
 
 logger = logging.getLogger("hem_tracker")
 
+MEASUREMENT_PAGE_SIZE = 100
+MAX_MEASUREMENT_PAGE_SIZE = 1000
+NEXT_PAGE_HEADER = "X-Next-After-Id"
+
+IMPORT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "text/csv": {"schema": {"type": "string", "example": ",".join(IMPORT_FIELDS + ("comment",))}},
+            "application/json": {"schema": {"type": "array", "items": MeasurementRequest.model_json_schema()}},
+        },
+    }
+}
+
+EXPORT_RESPONSES = {
+    200: {
+        "description": "The user's measurements, oldest first",
+        "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+    },
+    404: {"description": "User not found"},
+}
+
 router = APIRouter(
     prefix="/api/measurement",
     tags=["measurement"],
@@ -25,16 +52,75 @@ router = APIRouter(
 
 
 @router.get("/{username}/measurements/", response_model=list[UserMeasurements])
-def user_measurements(username: str, db: Session = Depends(get_db)):
-    measurements = get_user_measurements(db=db, username=username)
+def user_measurements(
+    username: str,
+    response: Response,
+    after_id: int | None = Query(None, description=f"Id from the {NEXT_PAGE_HEADER} header of the previous page."),
+    limit: int = Query(MEASUREMENT_PAGE_SIZE, ge=1, le=MAX_MEASUREMENT_PAGE_SIZE, description="Measurements per page."),
+    order: MeasurementOrder = Query("asc", description="Oldest (asc) or newest (desc) measurements first."),
+    db: Session = Depends(get_db),
+):
+    measurements = get_user_measurements(db=db, username=username, after_id=after_id, limit=limit, order=order)
+    set_next_page(response, measurements, limit)
     return measurements
 
 
+@router.get(
+    "/{username}/measurements/export",
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES,
+)
+def export_measurements(
+    username: str,
+    export_format: ExportFormat = Query("csv", alias="format", description="CSV or newline-delimited JSON."),
+    db: Session = Depends(get_db),
+):
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User with username {username} not found")
+    return export_response(stream_measurements(db, user.id, export_format), username, export_format)
+
+
+def export_response(content, username: str, export_format: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{username}-measurements.{export_format}"'},
+    )
+
+
+def set_next_page(response: Response, measurements: list[UserMeasurements], limit: int) -> None:
+    # A full page may be followed by another one, a short page is the last.
+    if len(measurements) == limit:
+        response.headers[NEXT_PAGE_HEADER] = str(measurements[-1].id)
+
+
 @router.post("/{username}/measurements/", response_model=MeasurementCreate)
 def create_measurement(username: str, measurement: MeasurementRequest, db: Session = Depends(get_db)):
     return create_user_measurement(db=db, username=username, measurement=measurement)
 
 
+@router.post(
+    "/{username}/measurements/import",
+    response_model=MeasurementImportResult,
+    openapi_extra=IMPORT_REQUEST_BODY,
+    responses={
+        400: {"description": "Unreadable upload"},
+        413: {"description": "Too many measurements"},
+        415: {"description": "Neither CSV nor JSON"},
+    },
+)
+async def import_measurements(
+    username: str,
+    request: Request,
+    skip_invalid: bool = Query(False, description="Import the valid measurements even if some are invalid."),
+    db: Session = Depends(get_db),
+):
+    body = await request.body()
+    rows = await run_in_threadpool(parse_import_rows, request.headers.get("content-type", ""), body)
+    return await run_in_threadpool(import_user_measurements, db, username, rows, skip_invalid)
+
+
 @router.post("/measurement/{username}/measurements", include_in_schema=False)
 async def redirect_measurements(username: str):
     return RedirectResponse(url=f"/measurement/{username}/measurements/", status_code=307)
@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
+MeasurementOrder = Literal["asc", "desc"]
+ExportFormat = Literal["csv", "ndjson"]
+
 
 #  todo: rewrite the schemas after this model:
 #
@@ -104,3 +107,15 @@ class MeasurementResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MeasurementImportError(BaseModel):
+    row: int = Field(..., description="Position of the measurement in the upload, 1 for the first one")
+    error: str = Field(..., description="Why the measurement was not imported")
+
+
+class MeasurementImportResult(BaseModel):
+    imported: int = Field(..., description="Number of measurements saved")
+    errors: List[MeasurementImportError] = Field(
+        default_factory=list, description="Measurements that could not be imported"
+    )
@@ -1,4 +1,6 @@
 import logging
+import traceback
+from typing import List
 
 from fastapi import HTTPException, Depends
 from sqlalchemy.orm import Session
@@ -7,9 +9,12 @@ from backend.src.common.logging_config import setup_logging
 from backend.src.common.utils import calculate_decay_constant, calculate_halving_time
 from backend.src.database.crud import get_user_by_username
 from backend.src.database.dependencies import get_db
-from backend.src.measurement.crud import save_measurement, delete, get_measurement
+from backend.src.database.models import User
+from backend.src.levels.service import refresh_user_curve
+from backend.src.measurement.bulk import prepare_import
+from backend.src.measurement.crud import save_measurement, save_measurements, delete, get_measurement
 from backend.src.measurement.schemas import MeasurementCreate, MeasurementRequest, \
-    MeasurementDelete
+    MeasurementDelete, MeasurementImportResult
 
 setup_logging()
 
@@ -25,15 +30,22 @@ def create_user_measurement(db: Session, username: str, measurement: Measurement
             detail=f"User with username {username} not found"
         )
 
+    new_measurement = measurement_for_user(user, measurement)
+    if save_measurement(db=db, measurement=new_measurement) is not None:
+        refresh_user_curve(db, user)
+    return new_measurement
+
+
+def measurement_for_user(user: User, measurement: MeasurementRequest) -> MeasurementCreate:
     decay_constant = calculate_decay_constant(peak_level=measurement.peak_level,
                                               measured_level=measurement.second_level_measurement,
                                               time_elapsed=measurement.time_elapsed)
-    logger.debug(f"Calculated decay constant for measurement for user {username}: {decay_constant}")
+    logger.debug(f"Calculated decay constant for measurement for user {user.username}: {decay_constant}")
 
     halving_time = calculate_halving_time(decay_constant=decay_constant)
-    logger.debug(f"Calculate halving time for measurement for user {username}: {halving_time}")
+    logger.debug(f"Calculate halving time for measurement for user {user.username}: {halving_time}")
 
-    new_measurement = MeasurementCreate(
+    return MeasurementCreate(
         user_id=user.id,
         peak_level=measurement.peak_level,
         time_elapsed=measurement.time_elapsed,
@@ -42,8 +54,30 @@ def create_user_measurement(db: Session, username: str, measurement: Measurement
         halving_time=halving_time,
         comment=measurement.comment
     )
-    save_measurement(db=db, measurement=new_measurement)
-    return new_measurement
+
+
+def import_user_measurements(
+    db: Session, username: str, rows: List[object], skip_invalid: bool = False
+) -> MeasurementImportResult:
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+
+    prepared = prepare_import(user.id, rows)
+    if prepared.errors and not skip_invalid:
+        return MeasurementImportResult(imported=0, errors=prepared.errors)
+    if prepared.measurements:
+        try:
+            save_measurements(db, user.id, prepared)
+        except Exception:
+            logger.error(f"Could not import measurements for user {username}: {traceback.format_exc()}")
+            raise HTTPException(status_code=500, detail="Could not save the measurements")
+        refresh_user_curve(db, user)
+    logger.info(f"Imported {len(prepared.measurements)} measurements for user {username}")
+    return MeasurementImportResult(imported=len(prepared.measurements), errors=prepared.errors)
 
 
 def delete_measurement(measurement_id: int, db: Session = Depends(get_db)) -> MeasurementDelete:
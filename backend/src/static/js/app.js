@@ -64,13 +64,7 @@ async function updateFactorLevels() {
         const decayData = await decayResponse.json();
         const decayConstant = decayData.decay_constant;
 
-        const updateResponse = await fetch('/api/levels/update-levels', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ decayConstant, peakLevel, weeklyInfusions, currentTime })
-        });
-
-        const updateData = await updateResponse.json();
+        const updateData = await fetchFactorLevels({ decayConstant, peakLevel, weeklyInfusions, currentTime });
         plotNewFactorLevelChart(updateData);
         createOrUpdateDoughnutChart(updateData);
 
@@ -3,6 +3,8 @@
 (function() {
     let doughnutChart;
     let factorLevelChart;
+    // The line chart is a few hundred pixels wide, more points than this are not visible.
+    const PLOT_MAX_POINTS = 400;
 
     const customTextPlugin = {
         id: 'customTextPlugin',
@@ -31,6 +33,34 @@
         }
     };
 
+    window.fetchFactorLevels = async function(settings) {
+        const response = await fetch(`/api/levels/update-levels?max_points=${PLOT_MAX_POINTS}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'application/octet-stream' },
+            body: JSON.stringify(settings)
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error while updating factor levels! status: ${response.status}`);
+        }
+
+        const values = new Float32Array(await response.arrayBuffer());
+        const hoursStart = parseFloat(response.headers.get('X-Hours-Start'));
+        const hoursStep = response.headers.get('X-Hours-Step');
+        const hoursCount = parseInt(response.headers.get('X-Hours-Count'));
+        // Downsampled curves have no fixed step and send their hours ahead of the levels.
+        const levels = hoursStep === null ? values.subarray(hoursCount) : values;
+        return {
+            hours: hoursStep === null
+                ? Array.from(values.subarray(0, hoursCount))
+                : Array.from(levels, (_, index) => hoursStart + index * parseFloat(hoursStep)),
+            start_of_week: response.headers.get('X-Start-Of-Week'),
+            levels: Array.from(levels),
+            current_time: response.headers.get('X-Current-Time'),
+            current_factor_level: response.headers.get('X-Current-Factor-Level').split(',').map(Number),
+            halving_time: parseFloat(response.headers.get('X-Halving-Time'))
+        };
+    };
+
     window.createOrUpdateDoughnutChart = function(data) {
         const ctx = document.getElementById('factorLevelDoughnutChart').getContext('2d');
         const currentFactorLevel = data.current_factor_level;
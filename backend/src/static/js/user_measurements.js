@@ -3,10 +3,24 @@ document.addEventListener('DOMContentLoaded', function () {
     document.getElementById('addMeasurementBtn').addEventListener('click', submitMeasurementForm);
 });
 
+function fetchMeasurementPages(username, afterId = null, measurements = []) {
+    const params = new URLSearchParams({ limit: 1000 });
+    if (afterId !== null) {
+        params.set('after_id', afterId);
+    }
+    return fetchWithToken(`/api/measurement/${username}/measurements/?${params}`)
+        .then(response => {
+            const nextAfterId = response.headers.get('X-Next-After-Id');
+            return response.json().then(page => {
+                const all = measurements.concat(page);
+                return nextAfterId === null ? all : fetchMeasurementPages(username, nextAfterId, all);
+            });
+        });
+}
+
 function fetchMeasurements() {
     const username = document.getElementById('username').value;
-    fetchWithToken(`/api/measurement/${username}/measurements/`)
-        .then(response => response.json())
+    fetchMeasurementPages(username)
         .then(data => {
             const measurementsList = document.getElementById('measurementsList');
             const noMeasurementsMessage = document.getElementById('noMeasurementsMessage');
@@ -4,7 +4,13 @@ document.addEventListener('DOMContentLoaded', function () {
 });
 
 function fetchUserDataForPlot(username) {
-    fetch(`/api/users/user-data/${username}`)
+    const localTime = new Date();
+    const currentTime = localTime.toLocaleString('en-US', {
+        weekday: 'long', hour: '2-digit', minute: '2-digit', hour12: true
+    });
+    const params = new URLSearchParams({ currentTime, max_points: 400 });
+
+    fetch(`/api/levels/user-levels/${username}?${params}`)
        .then(response => {
             if (!response.ok) {
                 throw new Error('Network response was not ok');
@@ -26,25 +32,7 @@ function fetchUserDataForPlot(username) {
 }
 
 function updateFactorLevels(data) {
-    const localTime = new Date();
-    const currentTime = localTime.toLocaleString('en-US', {
-        weekday: 'long', hour: '2-digit', minute: '2-digit', hour12: true
-    });
-
-    const decayConstant = data.decayConstant;
-    const peakLevel = data.peakLevel;
-    const weeklyInfusions = data.weeklyInfusions;
-
-    fetch('/api/levels/update-levels', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ decayConstant, peakLevel, weeklyInfusions, currentTime })
-    })
-    .then(response => response.json())
-    .then(data => {
-        createOrUpdateDoughnutChart(data);
-        plotNewFactorLevelChart(data);
-        addHalvingTime(data);
-    })
-    .catch(error => console.error('Error updating data:', error));
-}
\ No newline at end of file
+    createOrUpdateDoughnutChart(data);
+    plotNewFactorLevelChart(data);
+    addHalvingTime(data);
+}
@@ -0,0 +1,137 @@
+import logging
+
+from fastapi import APIRouter, Depends, Path, HTTPException
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from .router import oauth2_scheme
+from .schemas import UserUpdate, UserResponse, UserDataResponse, UserPlotData, MeasurementStats, \
+    USER_DATA_MEASUREMENTS
+from .service import user_plot_data, user_data_response, measurement_stats
+from ..authentication.domain import verify_token
+from ..core.config import TEMPLATES
+from ..database import async_crud
+from ..database.dependencies import get_async_db
+from ..levels.service import submit_user_curve, discard_user_curve
+from backend.src.common.logging_config import setup_logging
+
+setup_logging()
+
+logger = logging.getLogger("hem_tracker")
+
+router = APIRouter(
+    prefix="/api/users",
+    tags=["users"],
+    responses={
+        404: {"description": "User not found"},
+        500: {"description": "Internal server error"}
+    },
+)
+
+
+@router.put("/", response_model=UserResponse)
+async def edit_user(user: UserUpdate, db: AsyncSession = Depends(get_async_db)) -> UserResponse:
+    try:
+        db_user = await async_crud.update_user_by_username(db=db, user_update=user)
+        if db_user is not None and (user.peak_level or user.weekly_infusions):
+            submit_user_curve(db_user, await async_crud.get_decay_fit(db, db_user.id))
+        return UserResponse(message="User info updated", success=True)
+    except HTTPException as exc:
+        logger.error(f"Error while editing user data: {exc}")
+        return UserResponse(message="User not found", success=False)
+    except Exception as exc:
+        logger.error(f"Runtime error: {exc}")
+        return UserResponse(message="An error occurred while updating the user", success=False)
+
+
+@router.delete("/{username}", response_model=UserResponse)
+async def delete_user_endpoint(
+        username: str = Path(..., description="Username to delete"),
+        db: AsyncSession = Depends(get_async_db)
+) -> UserResponse:
+    try:
+        user = await async_crud.get_user_by_username(db=db, username=username)
+        if not user:
+            raise HTTPException(
+                status_code=404,
+                detail=f"User with username {username} not found"
+            )
+        await async_crud.delete_user_measurements(db, user)
+        await async_crud.delete_user_password_tokens(db, user)
+        await db.delete(user)
+        await db.commit()
+        discard_user_curve(user.id)
+        logger.info(f"Successfully deleted user: {username}")
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as exc:
+        await db.rollback()
+        logger.error(f"Error deleting user {username}: {str(exc)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while deleting the user"
+        )
+    return UserResponse(
+        message=f"User {username} successfully deleted",
+        success=True
+    )
+
+
+@router.get("/{username}/data", response_model=UserDataResponse)
+async def get_data(username: str, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_username(db=db, username=username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+    measurements = await async_crud.list_user_measurements(
+        db=db, user_id=user.id, limit=USER_DATA_MEASUREMENTS, order="desc"
+    )
+    return user_data_response(user, measurements)
+
+
+@router.get("/user-data/{username}", response_model=UserPlotData)
+async def user_plot_data_endpoint(username: str, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+    try:
+        return user_plot_data(user, await async_crud.get_decay_fit(db, user.id))
+    except Exception as exc:
+        logger.error(f"Error get user data user {username}: {str(exc)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while getting the user data"
+        )
+
+
+@router.get("/{username}/measurement-stats", response_model=MeasurementStats)
+async def measurement_stats_endpoint(username: str, db: AsyncSession = Depends(get_async_db)) -> MeasurementStats:
+    user = await async_crud.get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+    return measurement_stats(user, await async_crud.get_decay_fit(db, user.id))
+
+
+@router.get("/{username}", response_class=HTMLResponse)
+async def read_user_page(
+        username: str, request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
+    payload = verify_token(token)
+    if username != payload.get("sub"):
+        raise HTTPException(status_code=403, detail="Not authorized to access this user's data")
+    db_user = await async_crud.get_user_by_username(db, username=username)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    html_content = TEMPLATES.TemplateResponse("user.html", {"request": request, "user": db_user}).body.decode('utf-8')
+    return HTMLResponse(content=html_content)
@@ -7,9 +7,9 @@ from fastapi.responses import HTMLResponse
 from starlette.requests import Request
 
 
-from .schemas import UserUpdate, UserResponse, UserDataResponse, UserPlotData
+from .schemas import UserUpdate, UserResponse, UserDataResponse, UserPlotData, MeasurementStats
 from .service import edit_user_data, delete_user, get_user_data, \
-    get_user_plot_data
+    get_user_plot_data, get_measurement_stats
 from ..authentication.domain import verify_token
 from ..common.exceptions import UserNotFoundException
 from ..core.config import TEMPLATES
@@ -70,6 +70,11 @@ def user_plot_data(username: str, db: Session = Depends(get_db)):
     return user_data
 
 
+@router.get("/{username}/measurement-stats", response_model=MeasurementStats)
+def measurement_stats(username: str, db: Session = Depends(get_db)) -> MeasurementStats:
+    return get_measurement_stats(db=db, username=username)
+
+
 @router.get("/{username}", response_class=HTMLResponse)
 def read_user_page(username: str, request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = verify_token(token)
@@ -1,8 +1,12 @@
-from pydantic import BaseModel, Field, EmailStr, constr, conlist
+from pydantic import BaseModel, Field, EmailStr, constr, conlist, field_validator
 from typing import Optional, List
 
+from backend.src.levels.models import InfusionSchedule
+from backend.src.levels.utils import parse_schedule
 from backend.src.measurement.schemas import MeasurementResponse
 
+USER_DATA_MEASUREMENTS = 100
+
 
 class UserBase(BaseModel):
     username: constr(max_length=255) = Field(
@@ -32,9 +36,9 @@ class UserDataResponse(UserBase):
         None,
         description="List of weekly infusion times. Do not expect to exceed 5, a maximum of 20 defined."
     )
-    measurements: conlist(MeasurementResponse, min_length=1, max_length=100) = Field(
+    measurements: conlist(MeasurementResponse, max_length=USER_DATA_MEASUREMENTS) = Field(
         default_factory=list,
-        description="List of user measurements"
+        description="The user's most recent measurements, page through all of them with the measurement endpoint."
     )
 
     class Config:
@@ -83,6 +87,9 @@ class UserDelete(UserBase):
 class UserPlotData(UserBase):
     username: str = Field(..., alias='username', description='Username')
     decay_constant: float = Field(..., alias="decayConstant", description="Factor decay constant")
+    decay_constant_error: Optional[float] = Field(
+        None, alias="decayConstantError", description="Standard error of the fitted decay constant"
+    )
     peak_level: float = Field(..., alias="peakLevel", description="Peak factor level")
     weekly_infusions: conlist(str, min_length=1, max_length=20) = Field(
         ...,
@@ -90,11 +97,29 @@ class UserPlotData(UserBase):
         description="List of weekly infusion times. Do not expect to exceed 5, a maximum of 20 defined."
     )
 
+    @property
+    def schedule(self) -> InfusionSchedule:
+        return parse_schedule(tuple(self.weekly_infusions))
+
     class Config:
         populate_by_name = True
         from_attributes = True
 
 
+class MeasurementStats(BaseModel):
+    username: str = Field(..., description="Username")
+    count: int = Field(..., description="Number of measurements")
+    decay_constant_mean: Optional[float] = Field(None, description="Mean of the measured decay constants")
+    decay_constant_deviation: Optional[float] = Field(
+        None, description="Standard deviation of the measured decay constants"
+    )
+    halving_time_mean: Optional[float] = Field(None, description="Mean of the measured halving times in hours")
+    halving_time_deviation: Optional[float] = Field(
+        None, description="Standard deviation of the measured halving times in hours"
+    )
+    latest_measurement_id: Optional[int] = Field(None, description="Id of the user's latest measurement")
+
+
 class UserResponse(BaseModel):
     success: bool = Field(
         None,
@@ -119,6 +144,13 @@ class UserSignup(BaseModel):
         description="List of weekly infusion times. Do not expect to exceed 5, a maximum of 20 defined."
     )
 
+    @field_validator("weekly_infusions")
+    @classmethod
+    def weekly_infusions_must_parse(cls, weekly_infusions: List[str]) -> List[str]:
+        # They are stored as numeric times of the week, which needs them to parse.
+        parse_schedule(tuple(weekly_infusions))
+        return weekly_infusions
+
 
 class SignupResponse(BaseModel):
     detail: str = Field(..., example="Signup successful")
@@ -1,18 +1,21 @@
 import logging
 
-import numpy as np
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from . import domain
 from . import schemas
 from . import crud
-from .schemas import UserSignup, UserUpdate, UserDelete, UserPlotData, UserDataResponse
+from .schemas import UserSignup, UserUpdate, UserDelete, UserPlotData, UserDataResponse, MeasurementStats, \
+    USER_DATA_MEASUREMENTS
 from ..common.exceptions import DatabaseError, UserNotFoundException, UserAlreadyExistsError
-from ..common.utils import calculate_decay_constant
+from ..common.utils import mean_and_deviation
+from ..database.models import User, DecayFit, Measurement
 from ..database.crud import update_user_by_username, get_user_by_username, delete_user_measurements, \
-    delete_user_password_tokens, get_user_measurement
-from ..measurement.schemas import UserMeasurements
+    delete_user_password_tokens, list_user_measurements, get_decay_fit
+from ..levels.service import refresh_user_curve, discard_user_curve
+from ..levels.utils import format_refill_time
+from ..measurement.schemas import UserMeasurements, MeasurementResponse, MeasurementOrder
 from backend.src.common.logging_config import setup_logging
 
 setup_logging()
@@ -25,21 +28,7 @@ def signup_new_user(db: Session, user_data: UserSignup) -> None:
         logger.debug("Validate ")
         domain.validate_as_new_user(db, user_data.username, user_data.email)
 
-        formatted_infusions = domain.format_weekly_infusions(
-            user_data.weekly_infusions
-        )
-
-        new_user = schemas.UserCreate(
-            username=user_data.username,
-            password=user_data.password,
-            email=user_data.email,
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            peak_level=user_data.peak_level,
-            weekly_infusions=formatted_infusions,
-        )
-
-        crud.create_user(db=db, user=new_user)
+        crud.create_user(db=db, user=new_user_from_signup(user_data))
     except UserAlreadyExistsError as exc:
         logger.error(f"Username or email already registered for user {user_data.username}: {str(exc)}")
         raise
@@ -48,9 +37,27 @@ def signup_new_user(db: Session, user_data: UserSignup) -> None:
         raise DatabaseError from exc
 
 
+def new_user_from_signup(user_data: UserSignup) -> schemas.UserCreate:
+    formatted_infusions = domain.format_weekly_infusions(
+        user_data.weekly_infusions
+    )
+
+    return schemas.UserCreate(
+        username=user_data.username,
+        password=user_data.password,
+        email=user_data.email,
+        first_name=user_data.first_name,
+        last_name=user_data.last_name,
+        peak_level=user_data.peak_level,
+        weekly_infusions=formatted_infusions,
+    )
+
+
 def edit_user_data(db: Session, user: UserUpdate) -> None:
     try:
-        update_user_by_username(db=db, user_update=user)
+        db_user = update_user_by_username(db=db, user_update=user)
+        if db_user is not None and (user.peak_level or user.weekly_infusions):
+            refresh_user_curve(db, db_user)
     except UserNotFoundException as exc:
         logger.error(f"Error while updating the user info: {exc}")
         raise exc
@@ -67,6 +74,7 @@ def delete_user_and_measurements_by_username(db: Session, user: UserDelete):
         delete_user_password_tokens(db, db_user)
         db.delete(db_user)
         db.commit()
+        discard_user_curve(db_user.id)
         logger.debug(f"Deleted user and all measurements: {user}")
         return True
     return False
@@ -84,6 +92,7 @@ def delete_user(db: Session, username: str) -> None:
         delete_user_password_tokens(db, user)
         db.delete(user)
         db.commit()
+        discard_user_curve(user.id)
         logger.info(f"Successfully deleted user: {username}")
     except HTTPException:
         db.rollback()
@@ -105,7 +114,8 @@ def get_user_data(db: Session, username: str) -> UserDataResponse:
                 status_code=404,
                 detail=f"User with username {username} not found"
             )
-        return user
+        measurements = list_user_measurements(db=db, user_id=user.id, limit=USER_DATA_MEASUREMENTS, order="desc")
+        return user_data_response(user, measurements)
     except HTTPException:
         db.rollback()
         raise
@@ -118,6 +128,21 @@ def get_user_data(db: Session, username: str) -> UserDataResponse:
         )
 
 
+def user_data_response(user: User, latest_measurements: list[Measurement]) -> UserDataResponse:
+    return UserDataResponse(
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        email=user.email,
+        weekly_infusions=user.weekly_infusions,
+        peak_level=user.peak_level,
+        measurements=[
+            MeasurementResponse.model_validate(measurement, from_attributes=True)
+            for measurement in reversed(latest_measurements)
+        ],
+    )
+
+
 def get_user_plot_data(db: Session, username: str) -> UserPlotData:
     try:
         user = get_user_by_username(db, username)
@@ -126,20 +151,7 @@ def get_user_plot_data(db: Session, username: str) -> UserPlotData:
                 status_code=404,
                 detail=f"User with username {username} not found"
             )
-        measurements = get_user_measurement(db=db, user_id=user.id)
-        decay_constants = [calculate_decay_constant(measurement.peak_level, measurement.second_level_measurement,
-                                                    measurement.time_elapsed) for measurement in
-                           measurements]
-        mean_decay_constant = np.mean(decay_constants)
-        peak_level = user.peak_level
-        weekly_infusions_list = user.weekly_infusions.split(", ") if user.weekly_infusions else []
-
-        return UserPlotData(
-            username=username,
-            decay_constant=mean_decay_constant,
-            peak_level=peak_level,
-            weekly_infusions=weekly_infusions_list,
-        )
+        return user_plot_data(user, get_decay_fit(db=db, user_id=user.id))
 
     except HTTPException:
         raise
@@ -151,7 +163,56 @@ def get_user_plot_data(db: Session, username: str) -> UserPlotData:
         )
 
 
-def get_user_measurements(db: Session, username: str) -> list[UserMeasurements]:
+def user_plot_data(user: User, decay_fit: DecayFit | None) -> UserPlotData:
+    if decay_fit is None:
+        raise ValueError(f"No measurements for user {user.username}")
+    decay_constant, decay_constant_error = decay_fit.estimate()
+    weekly_infusions_list = [format_refill_time(minute) for minute in user.schedule.minutes_of_week()]
+
+    return UserPlotData(
+        username=user.username,
+        decay_constant=decay_constant,
+        decay_constant_error=decay_constant_error,
+        peak_level=user.peak_level,
+        weekly_infusions=weekly_infusions_list,
+    )
+
+
+def get_measurement_stats(db: Session, username: str) -> MeasurementStats:
+    user = get_user_by_username(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User with username {username} not found"
+        )
+    return measurement_stats(user, get_decay_fit(db=db, user_id=user.id))
+
+
+def measurement_stats(user: User, decay_fit: DecayFit | None) -> MeasurementStats:
+    if decay_fit is None:
+        return MeasurementStats(username=user.username, count=0)
+
+    count = decay_fit.measurement_count
+    decay_constant_mean, decay_constant_deviation = mean_and_deviation(
+        count, decay_fit.sum_decay_constant, decay_fit.sum_decay_constant_sq
+    )
+    halving_time_mean, halving_time_deviation = mean_and_deviation(
+        count, decay_fit.sum_halving_time, decay_fit.sum_halving_time_sq
+    )
+    return MeasurementStats(
+        username=user.username,
+        count=count,
+        decay_constant_mean=decay_constant_mean,
+        decay_constant_deviation=decay_constant_deviation,
+        halving_time_mean=halving_time_mean,
+        halving_time_deviation=halving_time_deviation,
+        latest_measurement_id=decay_fit.latest_measurement_id,
+    )
+
+
+def get_user_measurements(
+    db: Session, username: str, after_id: int | None = None, limit: int | None = None, order: MeasurementOrder = "asc"
+) -> list[UserMeasurements]:
     try:
         logger.debug(f"Attempt to read user measurement for user: {username}")
         user = get_user_by_username(db, username)
@@ -160,7 +221,7 @@ def get_user_measurements(db: Session, username: str) -> list[UserMeasurements]:
                 status_code=404,
                 detail=f"User with username {username} not found"
             )
-        measurements = get_user_measurement(db=db, user_id=user.id)
+        measurements = list_user_measurements(db=db, user_id=user.id, after_id=after_id, limit=limit, order=order)
 
         return [UserMeasurements.from_orm(measurement) for measurement in measurements]
 
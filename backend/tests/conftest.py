@@ -0,0 +1,71 @@
+from typing import Dict, Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.src.database.cache import user_cache
+from backend.src.database.database import Base
+from backend.src.database.dependencies import get_db
+from backend.src.main import app
+
+
+@pytest.fixture
+def engine() -> Iterator[Engine]:
+    # One in-memory SQLite database per test, shared by all sessions of the test.
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def db(session_factory: sessionmaker) -> Iterator[Session]:
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory: sessionmaker) -> Iterator[TestClient]:
+    def get_test_db() -> Iterator[Session]:
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    # The user cache is per process and keyed by username, which every test database reuses.
+    user_cache.clear()
+    app.dependency_overrides[get_db] = get_test_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    user_cache.clear()
+
+
+def signup(client: TestClient, username: str = "alice", peak_level: float = 50.0) -> Dict[str, object]:
+    user = {
+        "username": username,
+        "password": "password",
+        "email": f"{username}@example.com",
+        "peak_level": peak_level,
+        "weekly_infusions": ["Monday 08:30 AM", "Wednesday 08:30 PM", "Friday 08:30 PM"],
+    }
+    response = client.post("/auth/signup", json=user)
+    assert response.status_code == 200, response.text
+    return user
+
+
+def add_measurement(client: TestClient, username: str, time_elapsed: float, measured_level: float) -> None:
+    response = client.post(
+        f"/api/measurement/{username}/measurements/",
+        json={"peak_level": 50.0, "time_elapsed": time_elapsed, "second_level_measurement": measured_level},
+    )
+    assert response.status_code == 200, response.text
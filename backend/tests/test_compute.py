@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from backend.src.common.exceptions import ComputeBusyError
+from backend.src.levels.compute import ComputePool
+from backend.src.levels.engine import SAMPLE_MINUTES, create_sample_minutes, evaluate_levels, evaluate_levels_batch
+from backend.src.levels.models import FactorCalculationParameters
+from backend.src.levels.service import evaluate_level_bands
+
+WEEK = 24 * 7
+MINUTES = create_sample_minutes(0, WEEK * 60 // SAMPLE_MINUTES)
+PARAMS = FactorCalculationParameters(50.0, -0.05, [510, 4110, 6990], WEEK)
+
+
+@pytest.fixture(scope="module")
+def pooled():
+    # Everything goes to the worker processes.
+    pool = ComputePool(workers=2, max_pending=8, inline_samples=0)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def inline():
+    return ComputePool(workers=0, max_pending=8, inline_samples=0)
+
+
+@pytest.mark.parametrize(
+    "function, args",
+    [
+        (evaluate_levels, (MINUTES, PARAMS)),
+        (evaluate_levels_batch, (MINUTES, [PARAMS, FactorCalculationParameters(80.0, -0.02, [510], WEEK)])),
+        (evaluate_level_bands, (MINUTES, PARAMS, np.linspace(-0.08, -0.03, 50), [5.0, 50.0, 95.0])),
+    ],
+)
+def test_pooled_and_inline_results_agree(pooled, inline, function, args):
+    submitted = pooled.stats()["submitted"]
+    np.testing.assert_array_equal(pooled.run(len(MINUTES), function, *args), inline.run(len(MINUTES), function, *args))
+    assert pooled.stats()["submitted"] == submitted + 1
+    assert inline.stats()["inline"] == 1
+
+
+def test_small_computations_run_inline():
+    pool = ComputePool(workers=2, max_pending=8, inline_samples=len(MINUTES) + 1)
+    levels = pool.run(len(MINUTES), evaluate_levels, MINUTES, PARAMS)
+    np.testing.assert_array_equal(levels, evaluate_levels(MINUTES, PARAMS))
+    assert pool.stats()["inline"] == 1
+    assert pool.stats()["submitted"] == 0
+
+
+def test_full_pool_refuses_new_computations():
+    pool = ComputePool(workers=1, max_pending=0, inline_samples=0)
+    try:
+        with pytest.raises(ComputeBusyError):
+            pool.run(len(MINUTES), evaluate_levels, MINUTES, PARAMS)
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
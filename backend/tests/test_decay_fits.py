@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event
+
+from backend.src.database.crud import get_decay_fit, get_user_by_username, rebuild_decay_fit
+from backend.src.database.models import DecayFit
+from backend.tests.conftest import add_measurement, signup
+
+FIT_COLUMNS = (
+    "measurement_count",
+    "sum_tt",
+    "sum_ty",
+    "sum_yy",
+    "sum_decay_constant",
+    "sum_decay_constant_sq",
+    "sum_halving_time",
+    "sum_halving_time_sq",
+    "latest_measurement_id",
+)
+
+
+def fit_values(decay_fit: DecayFit):
+    return {column: getattr(decay_fit, column) for column in FIT_COLUMNS}
+
+
+def assert_matches_rebuilt_fit(db, username: str) -> None:
+    user = get_user_by_username(db, username)
+    stored = fit_values(get_decay_fit(db, user.id))
+    rebuilt = fit_values(rebuild_decay_fit(db, user.id))
+    db.rollback()
+    assert stored == pytest.approx(rebuilt)
+
+
+def test_saved_and_deleted_measurements_keep_the_fit_in_sync(client, session_factory):
+    signup(client)
+    for time_elapsed, measured_level in ((20.0, 15.0), (24.0, 12.0), (30.0, 9.0)):
+        add_measurement(client, "alice", time_elapsed, measured_level)
+    measurement_id = client.get("/api/measurement/alice/measurements/").json()[1]["id"]
+    assert client.delete(f"/api/measurement/alice/measurements/{measurement_id}").status_code == 200
+
+    with session_factory() as db:
+        assert_matches_rebuilt_fit(db, "alice")
+
+
+def test_bulk_import_adds_the_same_sums_as_single_saves(client, session_factory):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    rows = [
+        {"peak_level": 50.0, "time_elapsed": 24.0, "second_level_measurement": 12.0},
+        {"peak_level": 50.0, "time_elapsed": 30.0, "second_level_measurement": 9.0, "comment": "lab"},
+        {"peak_level": 50.0, "time_elapsed": 30.0, "second_level_measurement": 50.0},
+    ]
+
+    errors = [{"row": 3, "error": "The measured level must differ from the peak level"}]
+
+    # Nothing is imported from an upload with errors unless they are skipped.
+    response = client.post("/api/measurement/alice/measurements/import", json=rows)
+    assert response.json() == {"imported": 0, "errors": errors}
+    response = client.post("/api/measurement/alice/measurements/import?skip_invalid=true", json=rows)
+    assert response.json() == {"imported": 2, "errors": errors}
+
+    with session_factory() as db:
+        assert get_decay_fit(db, get_user_by_username(db, "alice").id).measurement_count == 3
+        assert_matches_rebuilt_fit(db, "alice")
+
+
+def test_reading_a_missing_fit_does_not_write(client, engine, session_factory):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    with session_factory() as db:
+        user_id = get_user_by_username(db, "alice").id
+        db.query(DecayFit).delete()
+        db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with session_factory() as db:
+        assert get_decay_fit(db, user_id).measurement_count == 1
+        assert not db.new
+        db.commit()
+        assert db.query(DecayFit).count() == 0
+    assert not [statement for statement in statements if not statement.lstrip().startswith("SELECT")]
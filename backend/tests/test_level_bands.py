@@ -0,0 +1,32 @@
+import numpy as np
+
+from backend.tests.conftest import signup
+
+
+def band_width(client, username: str) -> float:
+    response = client.get(
+        f"/api/levels/bands/{username}", params={"currentTime": "Monday 08:30 AM", "percentiles": [5.0, 95.0]}
+    )
+    assert response.status_code == 200, response.text
+    lower, upper = (band["levels"] for band in response.json()["bands"])
+    return float(np.max(np.subtract(upper, lower)))
+
+
+def import_measurements(client, username: str, count: int) -> None:
+    # The same two measured levels over and over, so the spread of single measurements stays the same.
+    rows = [
+        {"peak_level": 50.0, "time_elapsed": 20.0, "second_level_measurement": 15.0 if row % 2 else 10.0}
+        for row in range(count)
+    ]
+    assert client.post(f"/api/measurement/{username}/measurements/import", json=rows).json()["imported"] == count
+
+
+def test_bands_do_not_collapse_as_measurements_accumulate(client):
+    signup(client, "alice")
+    signup(client, "bob")
+    import_measurements(client, "alice", 10)
+    import_measurements(client, "bob", 100)
+
+    # The error of the fit alone would shrink by a factor of about 3 between the two users.
+    few, many = band_width(client, "alice"), band_width(client, "bob")
+    assert many > 0.7 * few > 0
@@ -0,0 +1,43 @@
+import pytest
+
+from backend.src.common.exceptions import NotAcceptableError
+from backend.src.levels.encoding import BINARY_MEDIA_TYPE, COMPACT_MEDIA_TYPE, negotiate_level_encoding
+
+SETTINGS = {
+    "initial_factor_level": 50.0,
+    "decay_constant": -0.05,
+    "weeklyInfusions": ["Monday 08:30 AM", "Friday 08:30 PM"],
+    "current_time": "Monday 08:30 AM",
+}
+
+
+@pytest.mark.parametrize(
+    "accept, encoding",
+    [
+        (None, "application/json"),
+        ("*/*", "application/json"),
+        ("application/*", "application/json"),
+        (f"{BINARY_MEDIA_TYPE}, application/json", BINARY_MEDIA_TYPE),
+        (f"application/json;q=0, {BINARY_MEDIA_TYPE}", BINARY_MEDIA_TYPE),
+        (f"{BINARY_MEDIA_TYPE};q=0.5, {COMPACT_MEDIA_TYPE};q=0.8, application/json;q=0.1", COMPACT_MEDIA_TYPE),
+        ("text/html, */*;q=0.8", "application/json"),
+        ("*/*, application/json;q=0", COMPACT_MEDIA_TYPE),
+    ],
+)
+def test_the_highest_weighted_supported_type_is_chosen(accept, encoding):
+    assert negotiate_level_encoding(accept) == encoding
+
+
+@pytest.mark.parametrize("accept", ["text/html", "application/json;q=0", "*/*;q=0"])
+def test_nothing_acceptable_is_refused(accept):
+    with pytest.raises(NotAcceptableError):
+        negotiate_level_encoding(accept)
+
+
+def test_levels_endpoint_answers_406_to_unsupported_types(client):
+    response = client.post("/api/levels/update-levels", json=SETTINGS, headers={"Accept": "text/html"})
+    assert response.status_code == 406
+    response = client.post(
+        "/api/levels/update-levels", json=SETTINGS, headers={"Accept": f"application/json;q=0, {BINARY_MEDIA_TYPE}"}
+    )
+    assert response.headers["content-type"] == BINARY_MEDIA_TYPE
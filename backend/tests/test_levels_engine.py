@@ -0,0 +1,138 @@
+from math import exp, isclose
+from typing import List
+
+import numpy as np
+import pytest
+
+from backend.src.levels.engine import (
+    SAMPLE_MINUTES,
+    create_sample_minutes,
+    evaluate_decay_draws,
+    evaluate_levels,
+    evaluate_levels_at,
+    evaluate_levels_batch,
+    iterate_levels,
+    minutes_to_hours,
+)
+from backend.src.levels.models import FactorCalculationParameters
+
+WEEK = 24 * 7
+
+# Monday 08:00 and Thursday 20:00, and one infusion off the 6-minute grid (Saturday 10:03).
+PARAMS = FactorCalculationParameters(
+    initial_factor_level=50.0, decay_constant=-0.05, refill_minutes=[480, 5520, 7803], week_duration=WEEK
+)
+
+
+def streamed_levels(params: FactorCalculationParameters, horizon: float, step_minutes: int):
+    chunks = list(iterate_levels(params, horizon=horizon, step_minutes=step_minutes))
+    return np.concatenate([hours for hours, _ in chunks]), np.concatenate([levels for _, levels in chunks])
+
+
+@pytest.mark.parametrize("step_minutes", [12, 60, 90, 720, 1440])
+def test_coarse_steps_match_the_six_minute_curve(step_minutes):
+    _, fine = streamed_levels(PARAMS, 2 * WEEK, SAMPLE_MINUTES)
+    hours, coarse = streamed_levels(PARAMS, 2 * WEEK, step_minutes)
+
+    samples = np.rint(hours * 60).astype(int) // SAMPLE_MINUTES
+    np.testing.assert_allclose(coarse, fine[samples], rtol=1e-12)
+
+
+def test_coarse_step_keeps_infusions_in_place():
+    # At a one-day step the first sample is Monday 00:00, 2.5 days of decay after the Saturday infusion.
+    hours, levels = streamed_levels(PARAMS, WEEK, 1440)
+    assert hours[0] == 0.0
+    assert levels[0] == pytest.approx(evaluate_levels(np.array([0]), PARAMS)[0])
+    assert levels[0] < PARAMS.initial_factor_level / 2
+
+
+def test_steps_off_the_sample_grid_agree_on_shared_instants():
+    # Every 6th sample of a 7-minute step and every 7th of the 6-minute curve fall on the same minute.
+    _, fine = streamed_levels(PARAMS, WEEK, SAMPLE_MINUTES)
+    _, odd = streamed_levels(PARAMS, WEEK, 7)
+    np.testing.assert_allclose(odd[::6], fine[::7][: len(odd[::6])], rtol=1e-12)
+
+
+def test_levels_at_agree_with_the_sampled_curve():
+    minutes = create_sample_minutes(0, WEEK * 60 // SAMPLE_MINUTES)
+    np.testing.assert_allclose(
+        evaluate_levels_at(minutes_to_hours(minutes), PARAMS), evaluate_levels(minutes, PARAMS), rtol=1e-12
+    )
+
+
+def test_batch_rows_match_single_evaluations():
+    minutes = create_sample_minutes(0, WEEK * 60 // SAMPLE_MINUTES)
+    scenarios = [
+        PARAMS,
+        FactorCalculationParameters(80.0, -0.02, [510], WEEK),
+        FactorCalculationParameters(30.0, -0.1, [], WEEK),
+    ]
+    levels = evaluate_levels_batch(minutes, scenarios)
+    for row, params in enumerate(scenarios):
+        np.testing.assert_allclose(levels[row], evaluate_levels(minutes, params), rtol=1e-12)
+
+
+def test_decay_draws_match_the_curve_of_each_decay_constant():
+    minutes = create_sample_minutes(0, WEEK * 60 // SAMPLE_MINUTES)
+    draws = np.array([-0.08, -0.05, -0.03])
+    curves = evaluate_decay_draws(minutes, PARAMS, draws)
+    for row, decay_constant in enumerate(draws):
+        params = FactorCalculationParameters(
+            PARAMS.initial_factor_level, float(decay_constant), PARAMS.refill_minutes, WEEK
+        )
+        np.testing.assert_allclose(curves[row], evaluate_levels(minutes, params), rtol=1e-12)
+
+
+def test_levels_decay_between_infusions():
+    minutes = np.array([480, 540, 600])
+    levels = evaluate_levels(minutes, PARAMS)
+    assert levels[2] == pytest.approx(levels[0] * np.exp(PARAMS.decay_constant * 2))
+
+
+def baseline_levels(week_hours: List[float], params: FactorCalculationParameters) -> List[float]:
+    # The per-sample loop the vectorized engine replaced, frozen here with its branches merged.
+    refill_hours = [minutes / 60 for minutes in params.refill_minutes]
+    levels = []
+    peak_value = params.initial_factor_level
+    for hour in week_hours:
+        if hour < refill_hours[0]:
+            previous_week_last_refill = refill_hours[-1] - params.week_duration
+            levels.append(params.initial_factor_level * exp(params.decay_constant * (hour - previous_week_last_refill)))
+            continue
+
+        for i in range(len(refill_hours)):
+            if isclose(hour, refill_hours[i]):
+                previous_hour = hour - 0.1
+                last_refill_hour = refill_hours[i - 1] if i else refill_hours[-1] - params.week_duration
+                peak_value = params.initial_factor_level + peak_value * exp(
+                    params.decay_constant * (previous_hour - last_refill_hour)
+                )
+                levels.append(peak_value)
+                break
+
+            if hour < refill_hours[i]:
+                last_refill_hour = refill_hours[i - 1] if i else refill_hours[-1] - params.week_duration
+                value = peak_value if i else params.initial_factor_level
+                levels.append(value * exp(params.decay_constant * (hour - last_refill_hour)))
+                break
+
+        if hour > refill_hours[-1]:
+            levels.append(peak_value * exp(params.decay_constant * (hour - refill_hours[-1])))
+
+    return levels
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        FactorCalculationParameters(50.0, -0.05, [510, 4110, 6990], WEEK),
+        FactorCalculationParameters(80.0, -0.02, [480], WEEK),
+        FactorCalculationParameters(30.0, -0.1, list(range(0, WEEK * 60, 1440)), WEEK),
+    ],
+)
+def test_levels_match_the_baseline_loop(params):
+    # np.exp and the scalar exp of the loop may round differently, so about a fifth of the samples differ by an ulp
+    # or two. Nothing else may.
+    week_hours = np.arange(0, WEEK, 0.1).round(2).tolist()
+    levels = evaluate_levels(create_sample_minutes(0, WEEK * 60 // SAMPLE_MINUTES), params)
+    np.testing.assert_allclose(levels, baseline_levels(week_hours, params), rtol=1e-14, atol=1e-12)
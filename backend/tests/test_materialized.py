@@ -0,0 +1,54 @@
+import numpy as np
+
+from backend.src.levels.materialized import UserCurveStore
+from backend.src.levels.models import UserCurve, UserCurveInputs
+from backend.src.levels.service import compute_user_curve
+from backend.tests.conftest import add_measurement, signup
+
+INPUTS = UserCurveInputs(initial_factor_level=50.0, decay_constant=-0.05, refill_minutes=(510, 4110, 6990))
+
+
+def curve(inputs: UserCurveInputs = INPUTS) -> UserCurve:
+    return UserCurve(inputs=inputs, levels=np.zeros(1), metrics=None)
+
+
+def test_store_keeps_the_most_recently_used_curves():
+    store = UserCurveStore(workers=1, max_entries=2, ttl=60)
+    for user_id in (1, 2):
+        store.put(user_id, curve())
+    assert store.get(1, INPUTS) is not None
+    store.put(3, curve())
+
+    assert store.get(2, INPUTS) is None
+    assert store.get(1, INPUTS) is not None
+    assert store.stats()["size"] == 2
+    assert store.stats()["evictions"] == 1
+
+
+def test_store_expires_old_curves_and_ignores_other_inputs():
+    store = UserCurveStore(workers=1, max_entries=2, ttl=0)
+    store.put(1, curve())
+    assert store.get(1, INPUTS) is None
+    assert store.stats()["expirations"] == 1
+
+    store = UserCurveStore(workers=1, max_entries=2, ttl=60)
+    store.put(1, curve())
+    assert store.get(1, INPUTS._replace(initial_factor_level=80.0)) is None
+
+
+def test_discarded_users_lose_their_curve():
+    store = UserCurveStore(workers=1, max_entries=2, ttl=60)
+    store.put(1, curve())
+    store.discard(1)
+    assert store.get(1, INPUTS) is None
+
+
+def test_materialized_levels_match_a_fresh_computation(client):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    response = client.get("/api/levels/user-levels/alice", params={"currentTime": "Monday 09:00 AM"})
+    assert response.status_code == 200
+
+    data = client.get("/api/users/user-data/alice").json()
+    inputs = UserCurveInputs(data["peakLevel"], data["decayConstant"], (510, 4110, 6990))
+    np.testing.assert_allclose(response.json()["levels"], compute_user_curve(inputs).levels)
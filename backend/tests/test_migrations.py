@@ -0,0 +1,86 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from backend.src.database.crud import get_decay_fit, get_user_by_username, rebuild_decay_fit
+from backend.src.database.migrate import check_query_plans, load_migrations, migration_version, upgrade
+from backend.src.database.models import DecayFit
+from backend.tests.conftest import add_measurement, signup
+
+
+def upgrade_version(engine, version: int) -> None:
+    migration = next(migration for migration in load_migrations() if migration_version(migration) == version)
+    with engine.begin() as connection:
+        migration.upgrade(connection)
+
+
+def test_migrations_are_numbered_in_order():
+    versions = [migration_version(migration) for migration in load_migrations()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_upgrade_of_a_current_schema_only_records_the_versions(engine):
+    indexes = {table: inspect(engine).get_indexes(table) for table in inspect(engine).get_table_names()}
+    assert upgrade(engine) == [migration_version(migration) for migration in load_migrations()]
+    assert upgrade(engine) == []
+    assert {table: inspect(engine).get_indexes(table) for table in indexes} == indexes
+    assert check_query_plans(engine) == {}
+
+
+def test_hot_path_indexes_are_not_duplicated():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255))"))
+        connection.execute(text("CREATE TABLE measurements (id INTEGER PRIMARY KEY, user_id INTEGER)"))
+        connection.execute(text("CREATE TABLE password_reset_tokens (id INTEGER PRIMARY KEY, user_id INTEGER)"))
+        # The index MySQL creates for a foreign key is named after the column.
+        connection.execute(text("CREATE INDEX user_id ON measurements (user_id)"))
+
+    upgrade_version(engine, 2)
+
+    indexes = inspect(engine)
+    assert [index["name"] for index in indexes.get_indexes("measurements")] == ["user_id"]
+    assert [index["name"] for index in indexes.get_indexes("users")] == ["ix_users_email"]
+    assert [index["name"] for index in indexes.get_indexes("password_reset_tokens")] == [
+        "ix_password_reset_tokens_user_id"
+    ]
+
+
+def test_infusion_times_are_migrated_to_rows():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(255), weekly_infusions VARCHAR(1000))")
+        )
+        connection.execute(
+            text(
+                "INSERT INTO users VALUES (1, 'alice', 'Wednesday 08:30 PM, Monday 8:30 am'), (2, 'bob', 'Someday'), "
+                "(3, 'carol', NULL)"
+            )
+        )
+
+    upgrade_version(engine, 4)
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT user_id, weekday, minute_of_day FROM user_infusions ORDER BY weekday"))
+        assert [tuple(row) for row in rows] == [(1, 0, 510), (1, 2, 1230)]
+
+
+def test_missing_decay_fits_are_backfilled(client, engine, session_factory):
+    signup(client, "alice")
+    signup(client, "bob")
+    for time_elapsed, measured_level in ((20.0, 15.0), (24.0, 12.0)):
+        add_measurement(client, "alice", time_elapsed, measured_level)
+    with session_factory() as db:
+        user_id = get_user_by_username(db, "alice").id
+        expected = rebuild_decay_fit(db, user_id)
+        expected = {column.name: getattr(expected, column.name) for column in DecayFit.__table__.columns}
+        db.rollback()
+        db.query(DecayFit).delete()
+        db.commit()
+
+    upgrade(engine)
+
+    with session_factory() as db:
+        assert db.query(DecayFit).count() == 1
+        stored = get_decay_fit(db, user_id)
+        assert {column.name: getattr(stored, column.name) for column in DecayFit.__table__.columns} == expected
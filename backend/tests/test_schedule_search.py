@@ -0,0 +1,15 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.levels import optimizer
+from backend.src.main import app
+
+
+def test_search_pool_is_shut_down_with_the_app():
+    with TestClient(app):
+        pool = optimizer.get_search_pool()
+        assert pool.submit(int, "1").result() == 1
+
+    assert optimizer._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(int, "1")
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+
+from backend.src.database.cache import user_cache
+from backend.tests.conftest import add_measurement, signup
+
+
+def count_user_selects(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return lambda: sum(1 for statement in statements if statement.startswith("SELECT") and "FROM users" in statement)
+
+
+def test_repeated_reads_are_served_from_the_cache(client, engine):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    assert client.get("/api/users/user-data/alice").json()["peakLevel"] == 50.0
+
+    user_selects = count_user_selects(engine)
+    assert client.get("/api/users/user-data/alice").json()["peakLevel"] == 50.0
+    assert user_selects() == 0
+
+
+def test_updates_invalidate_the_cached_user(client):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    client.get("/api/users/user-data/alice")
+
+    assert client.put("/api/users/", json={"username": "alice", "peak_level": 70.0}).json()["success"]
+    assert client.get("/api/users/user-data/alice").json()["peakLevel"] == 70.0
+
+
+def test_deleted_users_are_not_served_from_the_cache(client):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    client.get("/api/users/user-data/alice")
+    invalidations = user_cache.stats()["invalidations"]
+
+    assert client.delete("/api/users/alice").status_code == 200
+    assert user_cache.stats()["invalidations"] == invalidations + 1
+    assert client.get("/api/users/user-data/alice").status_code == 404
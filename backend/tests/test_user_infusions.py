@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+from backend.src.database.cache import user_cache
+from backend.tests.conftest import add_measurement, signup
+
+
+def test_user_levels_read_the_stored_infusion_rows(client, engine):
+    signup(client)
+    add_measurement(client, "alice", 20.0, 15.0)
+    # Only the numeric rows are read, the text is what the user typed and is no longer parsed.
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE users SET weekly_infusions = 'not a schedule'"))
+    user_cache.clear()
+
+    plot_data = client.get("/api/users/user-data/alice").json()
+    assert plot_data["weeklyInfusions"] == ["Monday 08:30 AM", "Wednesday 08:30 PM", "Friday 08:30 PM"]
+
+    response = client.get("/api/levels/bands/alice", params={"currentTime": "Monday 08:30 AM"})
+    assert response.status_code == 200, response.text